@@ -0,0 +1,183 @@
+"""measure the latency, peak memory and response size of the page callbacks for fixed scenarios
+
+run with ``python benchmarks/callbacks.py``, peak memory is traced in the server and in the job worker running the
+callback, every run is appended to a results file and compared with the previous
+run in it, the exit status is non-zero when a case got slower, used more memory or sent more bytes than the
+tolerance allows
+"""
+
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from contextvars import copy_context
+from pathlib import Path
+from statistics import median
+
+import dash
+from dash._callback_context import context_value
+from dash._utils import AttributeDict
+from plotly.io.json import to_json_plotly
+
+from openspace_app import app  # noqa: F401 registers the pages
+from openspace_app import archive, ephemeris, jobs, scenario
+
+#: default file every run is appended to
+RESULTS = Path(__file__).with_name("results.jsonl")
+
+#: metrics compared against the previous run
+METRICS = ("cold_ms", "warm_ms", "peak_kb", "worker_kb", "bytes")
+
+EPOCH = "2023-01-30 12:00:00"
+
+#: scenario with the chase 10 km ahead of the target instead of 5 km below it
+IN_TRACK = scenario.create(scenario.DEFAULT_EPOCH, scenario.DEFAULT_TARGET, (0, 10, 0, 0, 0, 0))
+
+#: image circle diameter, sensor width, sensor height and focal length in mm
+SENSORS = {
+    "default": (42, 13.2, 8.8, 360),
+    "small": (20, 6.4, 4.8, 100),
+    "full-frame": (60, 36, 24, 1000),
+}
+
+
+def page(name):
+    for entry in dash.page_registry.values():
+        if entry["module"].endswith("." + name):
+            return sys.modules[entry["module"]]
+    raise KeyError(name)
+
+
+def cases():
+    home, cw, inertial, od, hardware = (page(name) for name in ("home", "cw", "inertial", "od", "hardware"))
+    geo = scenario.default()
+    yield "home.update_target_epoch valid", home.update_target_epoch, (EPOCH,), None
+    yield "home.update_target_epoch invalid", home.update_target_epoch, ("2023-01-30",), None
+    yield "home.update_chase geo", home.update_chase, (EPOCH, *scenario.DEFAULT_TARGET, geo), None
+    yield "cw.update_plot radial", cw.update_plot, (-5, 0, 0, 0, 0, 1, geo), None
+    yield "cw.update_plot in-track", cw.update_plot, (0, 10, 0, 0, 0, 0, IN_TRACK), None
+    yield "inertial.update_plot radial", inertial.update_plot, (geo, None), None
+    yield "inertial.update_plot in-track", inertial.update_plot, (IN_TRACK, None), None
+    yield "od.update_plot radial", od.update_plot, (lambda _: None, geo), None
+    yield "od.update_plot in-track", od.update_plot, (lambda _: None, IN_TRACK), None
+    for name, (d, w, h, flen) in SENSORS.items():
+        yield "hardware.update_sensor_plot %s" % name, hardware.update_sensor_plot, (d, w, h, flen), "img-diameter"
+
+
+def call(function, args, triggered):
+    def run():
+        inputs = [{"prop_id": "%s.value" % triggered, "value": None}] if triggered else []
+        context_value.set(AttributeDict(triggered_inputs=inputs))
+        return function(*args)
+
+    return copy_context().run(run)
+
+
+def start_worker(trace):
+    # runs in every job worker, results are computed every time and the memory of each job is traced when asked
+    archive.disable()
+    if trace:
+        tracemalloc.start()
+
+
+def reset(trace=False):
+    # the stores of the server and its job workers are emptied so the next call pays for propagation like a new
+    # scenario would, a worker is started before timing so the call does not pay for its imports, and only the
+    # workers of the memory sample trace their allocations so timed calls run at full speed
+    ephemeris.store.clear()
+    jobs.executor.initargs = (trace,)
+    jobs.executor.configure(jobs.executor.workers, jobs.executor.queue_limit, jobs.executor.timeout)
+    jobs.executor.run("warm", int)
+    jobs.executor.peak = 0
+
+
+def measure(function, args, triggered, repeat):
+    reset()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = call(function, args, triggered)
+        times.append(time.perf_counter() - start)
+
+    # memory is measured on a separate cold call in the server and in the worker running its job
+    reset(trace=True)
+    tracemalloc.start()
+    call(function, args, triggered)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "cold_ms": times[0] * 1e3,
+        "warm_ms": median(times[1:] or times) * 1e3,
+        "peak_kb": peak / 1024,
+        "worker_kb": jobs.executor.peak / 1024,
+        "bytes": len(to_json_plotly(result)),
+    }
+
+
+def commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def previous(path):
+    if not path.exists():
+        return None
+    lines = [line for line in path.read_text().splitlines() if line.strip()]
+    return json.loads(lines[-1]) if lines else None
+
+
+def main():
+    cli = ArgumentParser(description=__doc__.splitlines()[0])
+    cli.add_argument("--repeat", type=int, default=5, help="calls of each case, the first is reported as cold")
+    cli.add_argument("--results", type=Path, default=RESULTS, help="file the run is appended to and compared with")
+    cli.add_argument("--tolerance", type=float, default=0.25, help="allowed fractional increase of each metric")
+    cli.add_argument("--no-save", action="store_true", help="compare without appending the run")
+    options = cli.parse_args()
+
+    # results are computed every time so cold calls measure propagation instead of reads of the on-disk archive
+    archive.disable()
+    jobs.executor.initializer = start_worker
+
+    baseline = previous(options.results)
+    run = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit(),
+        "python": platform.python_version(),
+        "cases": {},
+    }
+
+    regressions = []
+    print(f"{'case':<40}{'cold ms':>10}{'warm ms':>10}{'peak kB':>10}{'worker kB':>10}{'bytes':>10}")
+    for name, function, args, triggered in cases():
+        result = measure(function, args, triggered, max(options.repeat, 1))
+        run["cases"][name] = result
+        line = f"{name:<40}" + "".join(f"{result[metric]:>10.1f}" for metric in METRICS)
+
+        old = (baseline or {}).get("cases", {}).get(name)
+        if old:
+            worse = [m for m in METRICS if m in old and result[m] > old[m] * (1 + options.tolerance) + 1]
+            if worse:
+                line += "  " + " ".join(f"{m} {(result[m] / old[m] - 1) * 100 if old[m] else 0:+.0f}%" for m in worse)
+            regressions += [(name, m) for m in worse]
+        print(line)
+
+    if baseline:
+        print(f"compared with {baseline.get('commit') or 'unknown commit'} from {baseline.get('timestamp')}")
+    if not options.no_save:
+        with options.results.open("a") as results:
+            results.write(json.dumps(run) + "\n")
+
+    if regressions:
+        print("regressions: " + ", ".join(f"{name} {metric}" for name, metric in regressions))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
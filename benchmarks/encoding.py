@@ -0,0 +1,46 @@
+"""compare the size and serialization time of trace arrays sent as json lists and as typed arrays
+
+run with ``python benchmarks/encoding.py``
+"""
+
+from timeit import repeat
+
+import numpy as np
+from openspace.time import Epoch
+from plotly.io.json import to_json_plotly
+
+from openspace_app.decimation import decimate
+from openspace_app.encoding import MODES, encode
+from openspace_app.ephemeris import FUTURE_SPAN, positions, target_ephemeris
+from openspace_app.relative import display_times, trajectory
+
+REPEATS = 50
+
+
+def scenarios():
+    ep = Epoch.from_gregorian(2023, 1, 30, 12, 0, 0).value
+    inertial = positions(target_ephemeris(42164, 0, 0, 0, 3.074, 0, ep, FUTURE_SPAN))
+    relative = trajectory(np.array([-5, 0, 0, 0, 0, 0.001]), 42164, display_times())[:, :3]
+    return {
+        "inertial full": inertial,
+        "inertial decimated": decimate(inertial),
+        "relative": relative,
+    }
+
+
+def payload(points: np.ndarray, mode: str) -> dict:
+    return {axis: encode(values, mode) for axis, values in zip("xyz", points.T)}
+
+
+def main():
+    print(f"{'scenario':<20}{'mode':<10}{'bytes':>10}{'ratio':>8}{'encode+json (us)':>20}")
+    for name, points in scenarios().items():
+        baseline = len(to_json_plotly(payload(points, "list")))
+        for mode in MODES:
+            size = len(to_json_plotly(payload(points, mode)))
+            seconds = min(repeat(lambda: to_json_plotly(payload(points, mode)), number=REPEATS, repeat=5)) / REPEATS
+            print(f"{name:<20}{mode:<10}{size:>10}{size / baseline:>8.2f}{seconds * 1e6:>20.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""measure how the Monte Carlo filter study scales with the number of worker processes
+
+run with ``python benchmarks/monte_carlo.py [runs]``, worker counts double up to the number of cores
+"""
+
+import os
+import sys
+import time
+
+from openspace_app import estimation, jobs, scenario
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    values = scenario.values(scenario.default())
+
+    print(f"{'workers':>8}{'seconds':>10}{'runs/s':>10}")
+    # the study is the only caller so it may hold every slot
+    jobs.executor.share = 1
+    workers = 1
+    while True:
+        jobs.executor.configure(workers, jobs.QUEUE_LIMIT, jobs.TIMEOUT)
+        start = time.perf_counter()
+        estimation.monte_carlo(*values, runs=runs, seed=0)
+        elapsed = time.perf_counter() - start
+        print(f"{workers:>8}{elapsed:>10.2f}{runs / elapsed:>10.1f}")
+        if workers >= (os.cpu_count() or 1):
+            break
+        workers = min(2 * workers, os.cpu_count() or 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""summarize the cost of importing the application and check that heavy backend modules are deferred
+
+run with ``python benchmarks/startup.py``, the exit status is non-zero when a deferred module is imported at startup
+"""
+
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from openspace_app.lazy import DEFERRED
+
+#: number of cold starts measured, the fastest is reported
+RUNS = 3
+
+PATTERN = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+PROBE = f"""
+import sys, time
+start = time.perf_counter()
+import openspace_app.app
+print(time.perf_counter() - start)
+print(",".join(name for name in {DEFERRED!r} if name in sys.modules))
+"""
+
+
+def cold_start():
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE], capture_output=True, text=True, check=True
+    )
+    wall, loaded = result.stdout.splitlines()[-2:]
+    packages = defaultdict(int)
+    for line in result.stderr.splitlines():
+        match = PATTERN.match(line)
+        if match:
+            packages[match.group(4).split(".")[0]] += int(match.group(1))
+    return float(wall), [name for name in loaded.split(",") if name], packages
+
+
+def main():
+    runs = [cold_start() for _ in range(RUNS)]
+    wall, loaded, packages = min(runs, key=lambda run: run[0])
+
+    print(f"import openspace_app.app: {wall * 1e3:.0f} ms (fastest of {RUNS})")
+    print(f"{'package':<30}{'self ms':>10}")
+    for name, micros in sorted(packages.items(), key=lambda item: -item[1])[:20]:
+        print(f"{name:<30}{micros / 1e3:>10.1f}")
+
+    if loaded:
+        print("deferred modules imported at startup: " + ", ".join(loaded))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+import json
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Iterator, List
+
+import flask
+from openspace.math.constants import SECONDS_IN_DAY
+
+from openspace_app.jobs import ADMISSION_WAIT, Rejected, executor
+from openspace_app.lazy import lazy_import
+
+ephemeris = lazy_import("openspace_app.ephemeris")
+estimation = lazy_import("openspace_app.estimation")
+relative = lazy_import("openspace_app.relative")
+scenario = lazy_import("openspace_app.scenario")
+
+#: Prefix of every endpoint of the batch API
+PREFIX: str = "/api"
+
+#: Largest number of scenarios accepted in one request
+MAX_SCENARIOS: int = 1000
+
+#: Smallest number of seconds between samples of a solution
+MIN_STEP: float = 1
+
+#: Largest number of samples in the solution of one scenario
+MAX_POINTS: int = 10000
+
+
+def _bounded(job: Dict[str, Any], field: str, default: float, low: float, high: float) -> float:
+    value = float(job.get(field, default))
+    if not low <= value <= high:
+        raise ValueError("%s must be between %g and %g" % (field, low, high))
+    return value
+
+
+def _states(job: Dict[str, Any]) -> dict:
+    base = scenario.default()
+    target = [float(v) for v in job.get("target", base["target"])]
+    offset = [float(v) for v in job.get("offset", base["offset"])]
+    if len(target) != 6 or len(offset) != 6:
+        raise ValueError("target and offset must each hold 6 values")
+    return scenario.create(float(job.get("epoch", base["epoch"])), target, offset)
+
+
+def hcw(job: Dict[str, Any]) -> Dict[str, Any]:
+    """convert a GCRF chase state to the hill frame of a GCRF target
+
+    :param job: epoch in modified julian days, target and chase states in km and km/s
+    :type job: Dict[str, Any]
+    :return: hill state of the chase in km and km/s keyed by hcw
+    :rtype: Dict[str, Any]
+    """
+    chase = [float(v) for v in job["chase"]]
+    if len(chase) != 6:
+        raise ValueError("chase must hold 6 values")
+    stored = _states(job)
+    return {"hcw": list(ephemeris.hill_offset(stored["target"], chase, stored["epoch"]))}
+
+
+def hill(job: Dict[str, Any]) -> Dict[str, Any]:
+    """solve the relative motion of the chase about the target with the Clohessy-Wiltshire equations
+
+    :param job: scenario plus optional span in seconds of at most the future span of the dashboard and step of at
+        least MIN_STEP seconds, giving at most MAX_POINTS samples
+    :type job: Dict[str, Any]
+    :return: seconds from the epoch and hill states in km and km/s keyed by seconds and states
+    :rtype: Dict[str, Any]
+    """
+    stored = _states(job)
+    span = _bounded(job, "span", SECONDS_IN_DAY, MIN_STEP, ephemeris.FUTURE_SPAN * SECONDS_IN_DAY)
+    step = _bounded(job, "step", 600, MIN_STEP, span)
+    if span / step > MAX_POINTS:
+        raise ValueError("span over step must be at most %d samples" % MAX_POINTS)
+    times = relative.planning_times(span, step)
+    states = relative.trajectory(stored["offset"], stored["sma"], times)
+    return {"seconds": times.tolist(), "states": states.tolist()}
+
+
+def inertial(job: Dict[str, Any]) -> Dict[str, Any]:
+    """propagate the target and chase from the scenario epoch
+
+    :param job: scenario plus an optional span in days of at most the future span of the dashboard
+    :type job: Dict[str, Any]
+    :return: epochs in modified julian days and target and chase GCRF positions in km keyed by epochs, target and
+        chase
+    :rtype: Dict[str, Any]
+    """
+    x, y, z, vx, vy, vz, tgt_ep, r, i, c, vr, vi, vc = scenario.values(_states(job))
+    span = _bounded(job, "span", ephemeris.FUTURE_SPAN, 0, ephemeris.FUTURE_SPAN)
+    tgt_states = ephemeris.target_ephemeris(x, y, z, vx, vy, vz, tgt_ep, span)
+    chase_states = ephemeris.chase_ephemeris(x, y, z, vx, vy, vz, tgt_ep, r, i, c, vr, vi, vc, span)
+    return {
+        "epochs": [state.epoch.value for state in tgt_states],
+        "target": ephemeris.positions(tgt_states).tolist(),
+        "chase": ephemeris.positions(chase_states).tolist(),
+    }
+
+
+def wfov(job: Dict[str, Any]) -> Dict[str, Any]:
+    """run the chase wfov filter against the target over one day centered on the scenario epoch
+
+    :param job: scenario
+    :type job: Dict[str, Any]
+    :return: true and estimated hill positions in km keyed by truth and observed
+    :rtype: Dict[str, Any]
+    """
+    truth, observed = estimation.filter_history(*scenario.values(_states(job)))
+    return {"truth": truth.tolist(), "observed": observed.tolist()}
+
+
+#: Solvers of the batch API keyed by endpoint name
+SOLVERS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    "hcw": hcw,
+    "hill": hill,
+    "inertial": inertial,
+    "wfov": wfov,
+}
+
+
+def solve(kind: str, job: Dict[str, Any]) -> Dict[str, Any]:
+    """run one scenario through a solver, called in the worker processes
+
+    :param kind: key of SOLVERS
+    :type kind: str
+    :param job: fields of the scenario
+    :type job: Dict[str, Any]
+    :return: result of the solver
+    :rtype: Dict[str, Any]
+    """
+    return SOLVERS[kind](job)
+
+
+def stream(kind: str, jobs: List[Dict[str, Any]]) -> Iterator[str]:
+    """solve scenarios concurrently and yield each result as a line of json once it completes
+
+    scenarios are submitted to the shared executor as slots free up, when none of the scenarios of the request are in
+    progress and no slot frees up in time the remaining scenarios are refused with error lines
+
+    :param kind: key of SOLVERS
+    :type kind: str
+    :param jobs: fields of every scenario
+    :type jobs: List[Dict[str, Any]]
+    :return: lines holding the index of the scenario in the request and its result or error
+    :rtype: Iterator[str]
+    """
+    name = "api.%s" % kind
+    pending = deque(enumerate(jobs))
+    futures: Dict[Future, int] = {}
+    try:
+        while pending or futures:
+            while pending:
+                try:
+                    future = executor.submit(name, solve, kind, pending[0][1], wait=0 if futures else ADMISSION_WAIT)
+                except Rejected as error:
+                    if futures:
+                        break
+                    for index, _ in pending:
+                        yield json.dumps({"index": index, "error": "Rejected: %s" % error}) + "\n"
+                    return
+                futures[future] = pending.popleft()[0]
+
+            # the worker stops pure python jobs at the timeout, the stream gives up on jobs it cannot stop
+            deadline = min(executor.deadline(future) for future in futures)
+            done, _ = wait(futures, timeout=max(0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            for future in [f for f in futures if f not in done and executor.deadline(f) <= time.monotonic()]:
+                index = futures.pop(future)
+                reason = "TimeoutError: %s exceeded its limit of %g seconds" % (name, executor.timeout)
+                yield json.dumps({"index": index, "error": reason}) + "\n"
+            for future in done:
+                index = futures.pop(future)
+                try:
+                    line = {"index": index, **future.result()}
+                except BrokenProcessPool:
+                    executor.discard(executor.pool())
+                    line = {"index": index, "error": "the worker process solving the scenario failed"}
+                except Exception as error:
+                    # a failed scenario never ends the stream early, the client reads the reason from its line
+                    line = {"index": index, "error": "%s: %s" % (type(error).__name__, error)}
+                yield json.dumps(line) + "\n"
+    finally:
+        # scenarios not yet started are dropped when the client disconnects
+        for future in futures:
+            future.cancel()
+
+
+def register(server: flask.Flask) -> None:
+    """serve the batch API under PREFIX
+
+    every endpoint accepts a POST with a json object holding a list of scenarios and streams newline delimited json
+
+    :param server: flask server hosting the application
+    :type server: flask.Flask
+    """
+
+    @server.route("%s/<kind>" % PREFIX, methods=["POST"])
+    def batch(kind: str) -> flask.Response:
+        if kind not in SOLVERS:
+            return flask.jsonify(error="unknown endpoint, use one of %s" % ", ".join(SOLVERS)), 404
+
+        body = flask.request.get_json(silent=True)
+        jobs = body.get("scenarios") if isinstance(body, dict) else None
+        if not isinstance(jobs, list) or not all(isinstance(job, dict) for job in jobs):
+            return flask.jsonify(error="expected a json object with a list of scenario objects under scenarios"), 400
+        if len(jobs) > MAX_SCENARIOS:
+            return flask.jsonify(error="at most %d scenarios are accepted per request" % MAX_SCENARIOS), 413
+
+        return flask.Response(flask.stream_with_context(stream(kind, jobs)), mimetype="application/x-ndjson")
@@ -1,61 +1,151 @@
+import os
+import tempfile
 import webbrowser
+from argparse import ArgumentParser
 from threading import Timer
+from typing import List, Optional
 
 import dash
 import dash_bootstrap_components as dbc
+import diskcache
 import flask
 from dash import Dash, dcc, html
 
+from openspace_app import api, jobs, metrics, supersede
+from openspace_app.lazy import lazy_import
+from openspace_app.serve import serve
+from openspace_app.widgets import LITE_SWITCH
+
+archive = lazy_import("openspace_app.archive")
+encoding = lazy_import("openspace_app.encoding")
+
+#: directory used to hand long-running callback jobs to worker processes
+JOB_CACHE_DIR = os.path.join(tempfile.gettempdir(), "openspace-app-jobs")
+
+#: seconds to wait for the server to start before opening a browser
+BROWSER_DELAY = 2
+
+background_callback_manager = jobs.BoundedDiskcacheManager(diskcache.Cache(JOB_CACHE_DIR))
+
 app = Dash(
     __name__,
     use_pages=True,
+    background_callback_manager=background_callback_manager,
     external_stylesheets=[dbc.themes.BOOTSTRAP, "\\assets\\css\\custom-style.css"],
     server=flask.Flask(__name__),
     title="OTK - Home",
     meta_tags=[{"name": "viewport", "content": "width=device-width, initial-scale=1"}],
 )
 
-app.layout = dbc.Container(
-    [
-        html.Br(),
-        dbc.Row(
-            html.Img(className="header-img", src=dash.get_asset_url("img/openspace-header.png")),
-        ),
-        dbc.Row(
-            dash.page_container,
-        ),
-        dcc.Store(id="r-pos", storage_type="session", data=0),
-        dcc.Store(id="i-pos", storage_type="session", data=0),
-        dcc.Store(id="c-pos", storage_type="session", data=0),
-        dcc.Store(id="r-vel", storage_type="session", data=0),
-        dcc.Store(id="i-vel", storage_type="session", data=0),
-        dcc.Store(id="c-vel", storage_type="session", data=0),
-        dcc.Store(id="target-epoch", storage_type="session", data=0),
-        dcc.Store(id="year-input", storage_type="session", data=0),
-        dcc.Store(id="month-input", storage_type="session", data=0),
-        dcc.Store(id="day-input", storage_type="session", data=0),
-        dcc.Store(id="hour-input", storage_type="session", data=0),
-        dcc.Store(id="minute-input", storage_type="session", data=0),
-        dcc.Store(id="second-input", storage_type="session", data=0),
-        dcc.Store(id="target-x", storage_type="session", data=0),
-        dcc.Store(id="target-y", storage_type="session", data=0),
-        dcc.Store(id="target-z", storage_type="session", data=0),
-        dcc.Store(id="target-vx", storage_type="session", data=0),
-        dcc.Store(id="target-vy", storage_type="session", data=0),
-        dcc.Store(id="target-vz", storage_type="session", data=0),
-        dcc.Store(id="sma", storage_type="session", data=0),
-    ],
-)
+#: WSGI entry point, e.g. gunicorn openspace_app.app:server
+server = app.server
+
+metrics.register(server, app)
+jobs.register(server)
+api.register(server)
+
+
+def layout() -> dbc.Container:
+    # served on every page load so each browser tab gets its own supersede id
+    return dbc.Container(
+        [
+            html.Br(),
+            dbc.Row(
+                html.Img(className="header-img", src=dash.get_asset_url("img/openspace-header.png")),
+            ),
+            dbc.Row(
+                dbc.Col(
+                    dbc.Switch(
+                        id=LITE_SWITCH,
+                        label="Lite 2-D views",
+                        value=False,
+                        persistence=True,
+                        persistence_type="local",
+                    ),
+                    width="auto",
+                ),
+                justify="end",
+            ),
+            dbc.Row(
+                dash.page_container,
+            ),
+            dcc.Store(id="scenario", storage_type="session"),
+            supersede.tab_store(),
+        ],
+    )
+
+
+app.layout = layout
+
+
+def parser() -> ArgumentParser:
+    """create the command line interface of the openspace-app script
+
+    :return: parser of the serving options
+    :rtype: ArgumentParser
+    """
+    cli = ArgumentParser(prog="openspace-app", description="serve the openspace web application")
+    cli.add_argument("--host", default="localhost", help="interface to bind")
+    cli.add_argument("--port", type=int, default=8888, help="port to bind")
+    cli.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="worker processes, values above 1 serve with gunicorn so callbacks run on several cores",
+    )
+    cli.add_argument("--threads", type=int, default=4, help="request threads in each gunicorn worker")
+    cli.add_argument("--timeout", type=int, default=120, help="seconds before a stalled gunicorn worker is restarted")
+    cli.add_argument(
+        "--archive",
+        default=None,
+        help="directory of the on-disk trajectory cache shared by every worker, defaults to the temporary directory",
+    )
+    cli.add_argument("--archive-size", type=int, default=1024, help="megabytes kept in the on-disk trajectory cache")
+    cli.add_argument(
+        "--job-workers",
+        type=int,
+        default=None,
+        help="processes running the heavy callbacks and batch scenarios of each server process, defaults to the cores "
+        "divided by --workers",
+    )
+    cli.add_argument(
+        "--job-queue",
+        type=int,
+        default=jobs.QUEUE_LIMIT,
+        help="jobs allowed to wait for a free job worker before new jobs are refused with 503",
+    )
+    cli.add_argument(
+        "--job-timeout", type=float, default=jobs.TIMEOUT, help="seconds a job may run before it is stopped"
+    )
+    cli.add_argument(
+        "--encoding",
+        choices=list(encoding.MODES),
+        default=encoding.MODE,
+        help="form of trajectory arrays in callback responses, float32 and float64 send base64 typed arrays",
+    )
+    cli.add_argument("--open-browser", action="store_true", help="open the application in a web browser")
+    return cli
+
 
+def run(argv: Optional[List[str]] = None) -> None:
+    args = parser().parse_args(argv)
+    url = f"http://{args.host}:{args.port}"
+    if args.open_browser:
+        Timer(BROWSER_DELAY, webbrowser.open_new, [url]).start()
 
-def run():
-    host = "localhost"
-    port = 8888
-    url = f"http://{host}:{port}"
-    Timer(10, webbrowser.open_new(url))
+    settings = (args.archive or archive.ARCHIVE_DIR, args.archive_size * 2**20)
+    archive.configure(*settings)
+    encoding.MODE = args.encoding
+    jobs.executor.initializer, jobs.executor.initargs = archive.configure, settings
+    # every server process has its own job workers so together they use each core once
+    job_workers = args.job_workers or max(1, (os.cpu_count() or 1) // args.workers)
+    jobs.executor.configure(job_workers, args.job_queue, args.job_timeout)
 
     # run app
-    app.run(host=host, port=port, debug=False)
+    if args.workers > 1:
+        serve(server, args.host, args.port, args.workers, args.threads, args.timeout)
+    else:
+        app.run(host=args.host, port=args.port, debug=False)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,88 @@
+from typing import Tuple
+
+import numpy as np
+from numpy.polynomial import polynomial
+from openspace.math.constants import SECONDS_IN_DAY
+
+from openspace_app.ephemeris import Ephemeris
+
+
+def range_history(target: Ephemeris, chase: Ephemeris, epochs: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """difference target and chase ephemerides at common epochs
+
+    :param target: target ephemeris
+    :type target: Ephemeris
+    :param chase: chase ephemeris covering the same epochs
+    :type chase: Ephemeris
+    :param epochs: modified julian days of the samples in chronological order
+    :type epochs: np.ndarray
+    :return: seconds from the first sample of shape (n,) and the chase position in km and velocity in km/s relative
+        to the target, each of shape (n, 3)
+    :rtype: Tuple[np.ndarray, np.ndarray, np.ndarray]
+    """
+    tgt_position, tgt_velocity = target.sample(epochs)
+    chase_position, chase_velocity = chase.sample(epochs)
+    return (epochs - epochs[0]) * SECONDS_IN_DAY, chase_position - tgt_position, chase_velocity - tgt_velocity
+
+
+def range_minima(seconds: np.ndarray, position: np.ndarray, velocity: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """find every local minimum of the relative range and refine it between the samples that bracket it
+
+    minima are bracketed where the range rate changes from negative to positive, and the relative motion across the
+    bracket is interpolated with a cubic hermite polynomial matching the position and velocity at both samples
+
+    :param seconds: times of the samples of shape (n,)
+    :type seconds: np.ndarray
+    :param position: relative position in km of shape (n, 3)
+    :type position: np.ndarray
+    :param velocity: relative velocity in km/s of shape (n, 3)
+    :type velocity: np.ndarray
+    :return: times and ranges in km of each minimum, the first and last samples are included when the range
+        increases from or decreases to them
+    :rtype: Tuple[np.ndarray, np.ndarray]
+    """
+    distance = np.linalg.norm(position, axis=1)
+    rate = np.einsum("ij,ij->i", position, velocity)
+    times, ranges = [], []
+
+    if rate[0] >= 0:
+        times.append(seconds[0])
+        ranges.append(distance[0])
+
+    for k in np.flatnonzero((rate[:-1] < 0) & (rate[1:] >= 0)):
+        h = seconds[k + 1] - seconds[k]
+        p0, p1, v0, v1 = position[k], position[k + 1], velocity[k] * h, velocity[k + 1] * h
+        coefficients = np.stack([p0, v0, 3 * (p1 - p0) - 2 * v0 - v1, 2 * (p0 - p1) + v0 + v1])
+        squared = sum(polynomial.polymul(coefficients[:, j], coefficients[:, j]) for j in range(3))
+        roots = polynomial.polyroots(polynomial.polyder(squared))
+        candidates = np.concatenate([[0.0, 1.0], roots[np.isreal(roots)].real])
+        candidates = candidates[(candidates >= 0) & (candidates <= 1)]
+        values = polynomial.polyval(candidates, squared)
+        best = np.argmin(values)
+        times.append(seconds[k] + candidates[best] * h)
+        ranges.append(np.sqrt(max(values[best], 0.0)))
+
+    if rate[-1] <= 0:
+        times.append(seconds[-1])
+        ranges.append(distance[-1])
+
+    return np.array(times), np.array(ranges)
+
+
+def range_profile(target: Ephemeris, chase: Ephemeris, epochs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """summarize the range between target and chase ephemerides for plotting
+
+    :param target: target ephemeris
+    :type target: Ephemeris
+    :param chase: chase ephemeris covering the same epochs
+    :type chase: Ephemeris
+    :param epochs: modified julian days of the samples in chronological order
+    :type epochs: np.ndarray
+    :return: hours from the first sample and range in km of every sample of shape (n, 2) and of every refined minimum
+        of shape (m, 2)
+    :rtype: Tuple[np.ndarray, np.ndarray]
+    """
+    seconds, position, velocity = range_history(target, chase, epochs)
+    times, ranges = range_minima(seconds, position, velocity)
+    history = np.column_stack([seconds / 3600, np.linalg.norm(position, axis=1)])
+    return history, np.column_stack([times / 3600, ranges]).reshape(-1, 2)
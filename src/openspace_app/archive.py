@@ -0,0 +1,203 @@
+import os
+import socket
+import tempfile
+import time
+from hashlib import sha256
+from importlib.metadata import PackageNotFoundError, version
+from threading import Lock
+from typing import Callable, Optional, Sequence, TypeVar
+
+import diskcache
+import numpy as np
+
+from openspace_app import metrics
+
+#: Directory holding computed results shared by every worker process and kept across restarts
+ARCHIVE_DIR: str = os.path.join(tempfile.gettempdir(), "openspace-app-archive")
+
+#: Bytes kept on disk before the least recently used results are evicted
+SIZE_LIMIT: int = 2**30
+
+#: Seconds between checks of a result being computed by another thread or process
+FLIGHT_POLL: float = 0.02
+
+#: Seconds after which a computation whose owner cannot be checked is assumed abandoned and started again
+FLIGHT_LEASE: float = 300
+
+Result = TypeVar("Result")
+
+
+def _openspace_version() -> str:
+    try:
+        return version("openspace")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+class Archive:
+    def __init__(self, directory: str = ARCHIVE_DIR, size_limit: int = SIZE_LIMIT) -> None:
+        """class used to keep computed trajectories and filter histories on disk under a hash of their inputs
+
+        the directory may be shared by several processes, sqlite serializes their writes and every process opens
+        its own connection after a fork
+
+        :param directory: directory of the on-disk cache
+        :type directory: str
+        :param size_limit: bytes kept on disk before the least recently used results are evicted
+        :type size_limit: int
+        """
+        #: directory of the on-disk cache
+        self.directory: str = directory
+
+        #: bytes kept on disk before the least recently used results are evicted
+        self.size_limit: int = size_limit
+
+        #: results are neither read nor written when False
+        self.enabled: bool = True
+
+        #: number of lookups satisfied from disk
+        self.hits: int = 0
+
+        #: number of lookups that required a computation
+        self.misses: int = 0
+
+        #: number of lookups that waited for the same computation running in another thread or process
+        self.shared: int = 0
+
+        #: version of openspace included in every key so upgrades never read stale results
+        self.version: str = _openspace_version()
+
+        self._cache: Optional[diskcache.Cache] = None
+        self._lock: Lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._open()) if self.enabled else 0
+
+    def _open(self) -> diskcache.Cache:
+        with self._lock:
+            if self._cache is None:
+                self._cache = diskcache.Cache(
+                    self.directory, size_limit=self.size_limit, eviction_policy="least-recently-used"
+                )
+            return self._cache
+
+    def configure(self, directory: str, size_limit: int) -> None:
+        """move the archive to another directory or change its size limit
+
+        :param directory: directory of the on-disk cache
+        :type directory: str
+        :param size_limit: bytes kept on disk before the least recently used results are evicted
+        :type size_limit: int
+        """
+        with self._lock:
+            if self._cache is not None:
+                self._cache.close()
+                self._cache = None
+            self.directory = directory
+            self.size_limit = size_limit
+
+    def key(self, kind: str, values: Sequence) -> str:
+        """create the content address of a result from the kind of computation and its inputs
+
+        :param kind: name of the computation, results of different kinds never share a key
+        :type kind: str
+        :param values: numbers or arrays that fully define the result
+        :type values: Sequence
+        :return: hex digest of the kind, openspace version and the float64 bytes of every value
+        :rtype: str
+        """
+        digest = sha256(("%s\0%s" % (kind, self.version)).encode())
+        for value in values:
+            array = np.ascontiguousarray(value, dtype="<f8")
+            digest.update(repr(array.shape).encode())
+            digest.update(array.tobytes())
+        return digest.hexdigest()
+
+    def fetch(self, kind: str, values: Sequence, compute: Callable[[], Result]) -> Result:
+        """read the result stored for the argument inputs or compute and store it when missing
+
+        concurrent lookups of a missing result in any thread or process sharing the directory run one computation,
+        the others wait for its result and take over when it raises or its process dies
+
+        :param kind: name of the computation
+        :type kind: str
+        :param values: numbers or arrays that fully define the result
+        :type values: Sequence
+        :param compute: function that produces the result when it is not stored, the result must be picklable
+        :type compute: Callable[[], Result]
+        :return: the stored or computed result
+        :rtype: Result
+        """
+        if not self.enabled:
+            return compute()
+
+        cache = self._open()
+        key = self.key(kind, values)
+        result = cache.get(key, default=None, retry=True)
+        if result is not None:
+            self.hits += 1
+            return result
+
+        flight = "%s.flight" % key
+        owner = (socket.gethostname(), os.getpid())
+        while not cache.add(flight, owner, expire=FLIGHT_LEASE, retry=True):
+            time.sleep(FLIGHT_POLL)
+            result = cache.get(key, default=None, retry=True)
+            if result is not None:
+                self.shared += 1
+                return result
+            _release_if_abandoned(cache, flight)
+
+        try:
+            # the previous owner may have stored the result between the last check and its release
+            result = cache.get(key, default=None, retry=True)
+            if result is not None:
+                self.hits += 1
+                return result
+            self.misses += 1
+            result = compute()
+            cache.set(key, result, retry=True)
+            return result
+        finally:
+            cache.delete(flight, retry=True)
+
+    def clear(self) -> None:
+        """remove every stored result and reset the hit counters"""
+        if self.enabled:
+            self._open().clear(retry=True)
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+
+
+def _release_if_abandoned(cache: diskcache.Cache, flight: str) -> None:
+    # a computation owned by a process of this host that no longer exists is never finished by it
+    import psutil
+
+    owner = cache.get(flight, default=None, retry=True)
+    if owner is None or owner[0] != socket.gethostname() or psutil.pid_exists(owner[1]):
+        return
+    with cache.transact(retry=True):
+        if cache.get(flight, default=None) == owner:
+            cache.delete(flight)
+
+
+#: results shared by every worker process of the application
+store: Archive = Archive()
+metrics.registry.caches["archive"] = store
+
+
+def configure(directory: str, size_limit: int) -> None:
+    """apply the archive settings of the server in the current process, used as the initializer of job workers
+
+    :param directory: directory of the on-disk cache
+    :type directory: str
+    :param size_limit: bytes kept on disk before the least recently used results are evicted
+    :type size_limit: int
+    """
+    store.configure(directory, size_limit)
+
+
+def disable() -> None:
+    """keep the results of the current process in memory only, used by workers of throwaway studies"""
+    store.enabled = False
@@ -0,0 +1,33 @@
+// time scrubbing of precomputed trajectories, every update runs in the browser without a server round trip
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    animation: {
+        // move the position markers to the sample selected by the time slider
+        place: function (index, frames) {
+            if (!frames) {
+                return [window.dash_clientside.no_update, ""];
+            }
+            const k = Math.min(index || 0, frames.hours.length - 1);
+            const figure = new window.dash_clientside.Patch();
+            Object.entries(frames.markers).forEach(([trace, axes]) => {
+                figure.assign(["data", Number(trace), "x"], [axes[0][k]]);
+                figure.assign(["data", Number(trace), "y"], [axes[1][k]]);
+                figure.assign(["data", Number(trace), "z"], [axes[2][k]]);
+            });
+            const hours = frames.hours[k];
+            return [figure.build(), (hours < 0 ? "" : "+") + hours.toFixed(2) + " hours"];
+        },
+
+        // start or stop the interval that advances the time slider
+        toggle: function (clicks, disabled) {
+            return [!disabled, disabled ? "Pause" : "Play"];
+        },
+
+        // step the time slider forward, wrapping to the first sample after the last
+        advance: function (intervals, index, frames) {
+            if (!frames) {
+                return window.dash_clientside.no_update;
+            }
+            return ((index || 0) + 1) % frames.hours.length;
+        },
+    },
+});
@@ -0,0 +1,51 @@
+// lightweight 2-D views of 3-D trajectory graphs, switching and projecting never calls the server
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    projection: {
+        // show one of the two views, hidden 3-D traces become plain scatter traces so no WebGL scene is drawn
+        show: function (lite, figure) {
+            const type = lite ? "scatter" : "scatter3d";
+            const patch = new window.dash_clientside.Patch();
+            let changed = false;
+            ((figure && figure.data) || []).forEach((trace, k) => {
+                if ((trace.type === "scatter3d" || trace.type === "scatter") && trace.type !== type) {
+                    patch.assign(["data", k, "type"], type);
+                    changed = true;
+                }
+            });
+            return [
+                {display: lite ? "none" : "contents"},
+                {display: lite ? "contents" : "none"},
+                changed ? patch.build() : window.dash_clientside.no_update,
+            ];
+        },
+
+        // copy every trace of the 3-D figure into each panel, the coordinate arrays are shared and not decoded
+        project: function (figure, lite, liteFigure) {
+            if (!lite || !figure || !liteFigure) {
+                return window.dash_clientside.no_update;
+            }
+            const components = ["x", "y", "z"];
+            const data = [];
+            liteFigure.layout.meta.panels.forEach(([h, v], p) => {
+                const suffix = p ? String(p + 1) : "";
+                figure.data.forEach((trace) => {
+                    data.push({
+                        type: "scatter",
+                        mode: trace.mode,
+                        name: trace.name,
+                        line: trace.line,
+                        marker: trace.marker,
+                        visible: trace.visible,
+                        legendgroup: trace.name,
+                        showlegend: p === 0,
+                        x: trace[components[h]],
+                        y: trace[components[v]],
+                        xaxis: "x" + suffix,
+                        yaxis: "y" + suffix,
+                    });
+                });
+            });
+            return {data: data, layout: liteFigure.layout};
+        },
+    },
+});
@@ -0,0 +1,151 @@
+from math import pi, radians
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from openspace.bodies.celestial import Earth
+from openspace.coordinates.elements import ClassicalElements
+from openspace.coordinates.states import GCRF
+from openspace.math.constants import SECONDS_IN_DAY
+from openspace.math.linalg import Vector3D
+from openspace.propagators.inertial import RK4
+from openspace.time import Epoch
+
+from openspace_app import jobs
+from openspace_app.decimation import decimate
+from openspace_app.ephemeris import positions, propagate
+
+#: Number of objects propagated by one job
+BATCH_SIZE: int = 4
+
+#: Largest number of days between the epoch of an object and the target epoch, element sets of a catalog are often
+#: spread over several days and each day of the gap costs as many steps as the drawn track
+EPOCH_WINDOW: float = 3
+
+#: Number of points kept from the trajectory of each object when the catalog is drawn
+POINT_BUDGET: int = 48
+
+#: Name, epoch in modified julian days, position in km and velocity in km/s of a catalog object
+Entry = Tuple[str, float, float, float, float, float, float, float]
+
+
+def _tle_entry(name: str, line1: str, line2: str) -> Entry:
+    year, day = int(line1[18:20]), float(line1[20:32])
+    ep = Epoch.from_gregorian(year + (1900 if year >= 57 else 2000), 1, 1, 0, 0, 0).plus_days(day - 1)
+    n = float(line2[52:63]) * 2 * pi / SECONDS_IN_DAY
+    elements = ClassicalElements(
+        ep,
+        (Earth.MU / (n * n)) ** (1 / 3),
+        float("0." + line2[26:33].strip()),
+        radians(float(line2[8:16])),
+        radians(float(line2[17:25])),
+        radians(float(line2[34:42])),
+        radians(float(line2[43:51])),
+    )
+    state = elements.to_ijk()
+    p, v = state.position, state.velocity
+    return name or line2[2:7].strip(), ep.value, p.x, p.y, p.z, v.x, v.y, v.z
+
+
+def parse(text: str) -> List[Entry]:
+    """read a catalog of two-line element sets or comma separated inertial states
+
+    element sets may be preceded by a name line and are converted to a state without SGP4 so they are only
+    approximate. state rows hold name, epoch in modified julian days, position in km and velocity in km/s. blank
+    lines and lines starting with # are ignored.
+
+    :param text: contents of the catalog file
+    :type text: str
+    :return: every object of the catalog
+    :rtype: List[Entry]
+    """
+    lines = [line.rstrip() for line in text.splitlines() if line.strip() and not line.startswith("#")]
+    entries = []
+    k = 0
+    while k < len(lines):
+        fields = [field.strip() for field in lines[k].split(",")]
+        if lines[k].startswith("1 ") and k + 1 < len(lines) and lines[k + 1].startswith("2 "):
+            entries.append(_tle_entry("", lines[k], lines[k + 1]))
+            k += 2
+        elif len(fields) == 8:
+            entries.append((fields[0], *(float(field) for field in fields[1:])))
+            k += 1
+        elif k + 2 < len(lines) and lines[k + 1].startswith("1 ") and lines[k + 2].startswith("2 "):
+            name = lines[k].strip()
+            entries.append(_tle_entry(name[2:] if name.startswith("0 ") else name, lines[k + 1], lines[k + 2]))
+            k += 3
+        else:
+            raise ValueError("catalog line %d is neither an element set nor a state row" % (k + 1))
+    return entries
+
+
+def nearby(entries: Sequence[Entry], tgt_ep: float, gap: float = EPOCH_WINDOW) -> List[Entry]:
+    """keep the objects whose epoch is close enough to the target epoch to be stepped there quickly
+
+    :param entries: objects of a catalog
+    :type entries: Sequence[Entry]
+    :param tgt_ep: epoch in modified julian days the tracks start from
+    :type tgt_ep: float
+    :param gap: largest number of days between the epoch of an object and the target epoch
+    :type gap: float
+    :return: the objects within the gap in catalog order
+    :rtype: List[Entry]
+    """
+    return [entry for entry in entries if abs(entry[1] - tgt_ep) <= gap]
+
+
+def _tracks(job: Tuple[Sequence[Entry], float, float]) -> List[np.ndarray]:
+    entries, tgt_ep, span = job
+    paths = []
+    for _, ep, x, y, z, vx, vy, vz in entries:
+        propagator = RK4(GCRF(Epoch(ep), Vector3D(x, y, z), Vector3D(vx, vy, vz)))
+        propagator.step_to_epoch(Epoch(tgt_ep))
+        state = propagator.state
+        paths.append(decimate(positions([state] + propagate(state, span)), POINT_BUDGET))
+    return paths
+
+
+def tracks(
+    entries: Sequence[Entry],
+    tgt_ep: float,
+    span: float,
+    name: str = "catalog.tracks",
+    checkpoint: Optional[Callable[[], None]] = None,
+) -> List[np.ndarray]:
+    """propagate every catalog object from the target epoch on the job workers, BATCH_SIZE objects per job
+
+    :param entries: objects to be propagated
+    :type entries: Sequence[Entry]
+    :param tgt_ep: epoch in modified julian days the tracks start from
+    :type tgt_ep: float
+    :param span: number of days to propagate
+    :type span: float
+    :param name: name of the callback the jobs are counted against
+    :type name: str
+    :param checkpoint: called between jobs, may raise to stop and drop the remaining objects
+    :type checkpoint: Optional[Callable[[], None]]
+    :return: decimated positions in km of each object in catalog order
+    :rtype: List[np.ndarray]
+    """
+    chunks = []
+    for start in range(0, len(entries), BATCH_SIZE):
+        stop = start + BATCH_SIZE
+        chunks.append((entries[start:stop], tgt_ep, span))
+    return [path for paths in jobs.executor.map(name, _tracks, chunks, checkpoint) for path in paths]
+
+
+def combine(paths: Sequence[np.ndarray], groups: int) -> List[np.ndarray]:
+    """join object tracks into a fixed number of traces separated by gaps
+
+    :param paths: positions of each object
+    :type paths: Sequence[np.ndarray]
+    :param groups: number of traces
+    :type groups: int
+    :return: positions of shape (n, 3) for each trace with a row of nan between objects, unused traces are empty
+    :rtype: List[np.ndarray]
+    """
+    gap = np.full((1, 3), np.nan)
+    combined = []
+    for members in np.array_split(np.arange(len(paths)), groups):
+        parts = [part for k in members for part in (paths[k], gap)]
+        combined.append(np.concatenate(parts[:-1]) if parts else np.empty((0, 3)))
+    return combined
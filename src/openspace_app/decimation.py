@@ -0,0 +1,55 @@
+import numpy as np
+
+#: Largest number of points sent to the browser for one trace
+POINT_BUDGET: int = 150
+
+
+def largest_triangle(points: np.ndarray, budget: int = POINT_BUDGET) -> np.ndarray:
+    """select the samples of a trajectory that best preserve its shape using largest-triangle-three-buckets
+
+    :param points: samples of shape (n, d) in chronological order
+    :type points: np.ndarray
+    :param budget: maximum number of samples to keep
+    :type budget: int
+    :return: sorted indices of the kept samples, always including the first and last
+    :rtype: np.ndarray
+    """
+    n = len(points)
+    if budget >= n or budget < 3:
+        return np.arange(n)
+
+    # the first and last samples are always kept so the interior is split into budget - 2 buckets
+    edges = np.linspace(1, n - 1, budget - 1).astype(int)
+    kept = np.empty(budget, dtype=int)
+    kept[0], kept[-1] = 0, n - 1
+    for k in range(budget - 2):
+        lo, hi = edges[k], edges[k + 1]
+        if k + 2 < len(edges):
+            end = edges[k + 2]
+            following = points[hi:end].mean(axis=0)
+        else:
+            following = points[-1]
+        anchor = points[kept[k]]
+        a, b = points[lo:hi] - anchor, following - anchor
+        if points.shape[1] == 2:
+            # np.cross of 2-D vectors is deprecated in numpy 2
+            area = np.abs(a[:, 0] * b[1] - a[:, 1] * b[0])
+        else:
+            area = np.linalg.norm(np.cross(a, b), axis=-1)
+        kept[k + 1] = lo + int(np.argmax(area))
+
+    return kept
+
+
+def decimate(points: np.ndarray, budget: int = POINT_BUDGET) -> np.ndarray:
+    """reduce a trajectory to the point budget for display
+
+    :param points: samples of shape (n, d) in chronological order
+    :type points: np.ndarray
+    :param budget: maximum number of samples to keep
+    :type budget: int
+    :return: the kept samples of shape (m, d) with m no greater than budget
+    :rtype: np.ndarray
+    """
+    points = np.asarray(points, dtype=float)
+    return points[largest_triangle(points, budget)]
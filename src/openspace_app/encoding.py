@@ -0,0 +1,64 @@
+from base64 import b64encode
+from io import StringIO
+from typing import Dict, List, Sequence, Union
+
+import numpy as np
+from dash import Patch
+
+#: Available encodings of trace arrays in callback responses
+MODES: Dict[str, str] = {"list": "", "float32": "f4", "float64": "f8"}
+
+#: Encoding applied to trace arrays, "list" sends plain json numbers
+MODE: str = "list"
+
+
+def encode(values: np.ndarray, mode: str = "") -> Union[List[float], Dict[str, str]]:
+    """convert an array of samples to the form sent to the browser
+
+    :param values: one or two-dimensional array of samples
+    :type values: np.ndarray
+    :param mode: key of MODES to use instead of MODE
+    :type mode: str
+    :return: a list of floats or a plotly typed array of base64 encoded bytes
+    :rtype: Union[List[float], Dict[str, str]]
+    """
+    dtype = MODES[mode or MODE]
+    if not dtype:
+        return np.asarray(values, dtype=float).tolist()
+
+    buffer = np.ascontiguousarray(values, dtype=np.dtype(dtype).newbyteorder("<"))
+    encoded = {"dtype": dtype, "bdata": b64encode(buffer.tobytes()).decode("ascii")}
+    if buffer.ndim > 1:
+        encoded["shape"] = ",".join(str(n) for n in buffer.shape)
+    return encoded
+
+
+def assign_trace(figure: Patch, trace: int, points: np.ndarray, mode: str = "") -> None:
+    """replace the coordinate arrays of one trace in a figure patch
+
+    :param figure: patch of the figure being updated
+    :type figure: Patch
+    :param trace: index of the trace in the figure data
+    :type trace: int
+    :param points: samples of shape (n, 2) or (n, 3) assigned to x, y and z in order
+    :type points: np.ndarray
+    :param mode: key of MODES to use instead of MODE
+    :type mode: str
+    """
+    for axis, values in zip("xyz", np.asarray(points).T):
+        figure["data"][trace][axis] = encode(values, mode)
+
+
+def table(columns: Sequence[str], *blocks: np.ndarray) -> str:
+    """format full resolution samples as comma separated text for download
+
+    :param columns: name of every column
+    :type columns: Sequence[str]
+    :param blocks: arrays of shape (n,) or (n, k) placed side by side
+    :type blocks: np.ndarray
+    :return: a header line followed by one line per sample
+    :rtype: str
+    """
+    text = StringIO()
+    np.savetxt(text, np.column_stack(blocks), fmt="%.15g", delimiter=",", header=",".join(columns), comments="")
+    return text.getvalue()
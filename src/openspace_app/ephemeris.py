@@ -0,0 +1,548 @@
+from collections import OrderedDict
+from hashlib import sha1
+from math import ceil
+from threading import Lock
+from typing import Callable, Hashable, List, Optional, Sequence, Tuple, TypeVar, Union
+
+import numpy as np
+from openspace.bodies.artificial import Spacecraft
+from openspace.coordinates.states import GCRF, HCW, StateConvert
+from openspace.math.constants import SECONDS_IN_DAY
+from openspace.math.linalg import Vector3D, Vector6D
+from openspace.propagators.inertial import RK4
+from openspace.time import Epoch
+
+from openspace_app import archive, metrics
+
+#: span in days propagated backward from the scenario epoch
+PAST_SPAN: float = -0.5
+
+#: span in days propagated forward from the scenario epoch
+FUTURE_SPAN: float = 1.0
+
+#: Seconds between the samples drawn from an ephemeris for display, the step of the dense trajectories
+DISPLAY_STEP: float = RK4.MAX_STEP
+
+#: Largest position error in km of a coarse ephemeris against the dense trajectory, estimated over the whole span
+PATH_TOLERANCE: float = 1.0
+
+#: Longest interval in seconds between neighboring nodes of a coarse ephemeris
+MAX_NODE_STEP: float = 1200
+
+
+class Ephemeris:
+    def __init__(self, epochs: np.ndarray, positions: np.ndarray, velocities: np.ndarray, error: float = 0) -> None:
+        """class used to interpolate a trajectory between propagated nodes with cubic hermite polynomials
+
+        :param epochs: modified julian day of every node in increasing order of shape (n,)
+        :type epochs: np.ndarray
+        :param positions: GCRF position in km at every node of shape (n, 3)
+        :type positions: np.ndarray
+        :param velocities: GCRF velocity in km/s at every node of shape (n, 3)
+        :type velocities: np.ndarray
+        :param error: largest position error in km estimated against the dense trajectory
+        :type error: float
+        """
+        #: modified julian day of every node
+        self.epochs: np.ndarray = np.asarray(epochs, dtype=float)
+
+        #: GCRF position in km at every node
+        self.positions: np.ndarray = np.asarray(positions, dtype=float).reshape(-1, 3)
+
+        #: GCRF velocity in km/s at every node
+        self.velocities: np.ndarray = np.asarray(velocities, dtype=float).reshape(-1, 3)
+
+        #: largest position error in km estimated against the dense trajectory, zero when the nodes are its states
+        self.error: float = error
+
+        self._seconds: np.ndarray = (self.epochs - self.epochs[0]) * SECONDS_IN_DAY
+
+    def __len__(self) -> int:
+        return len(self.epochs)
+
+    @classmethod
+    def from_rows(cls, rows: np.ndarray, error: float = 0) -> "Ephemeris":
+        """create an ephemeris from the array produced by rows
+
+        :param rows: epoch, position and velocity of every node of shape (n, 7)
+        :type rows: np.ndarray
+        :param error: largest position error in km estimated against the dense trajectory
+        :type error: float
+        :return: ephemeris interpolating the nodes
+        :rtype: Ephemeris
+        """
+        return cls(rows[:, 0], rows[:, 1:4], rows[:, 4:], error)
+
+    def rows(self) -> np.ndarray:
+        """collect the nodes of the ephemeris
+
+        :return: epoch, position and velocity of every node of shape (n, 7)
+        :rtype: np.ndarray
+        """
+        return np.column_stack([self.epochs, self.positions, self.velocities])
+
+    def sample(self, epochs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """interpolate the position and velocity at every argument epoch
+
+        :param epochs: modified julian days between the first and last node
+        :type epochs: np.ndarray
+        :return: GCRF positions in km and velocities in km/s, each of shape (len(epochs), 3)
+        :rtype: Tuple[np.ndarray, np.ndarray]
+        """
+        seconds = (np.asarray(epochs, dtype=float).reshape(-1) - self.epochs[0]) * SECONDS_IN_DAY
+        if np.any((seconds < -1e-3) | (seconds > self._seconds[-1] + 1e-3)):
+            raise ValueError("epochs must lie between the first and last node of the ephemeris")
+
+        k = np.clip(np.searchsorted(self._seconds, seconds, side="right") - 1, 0, max(len(self) - 2, 0))
+        if len(self) < 2:
+            return self.positions[k], self.velocities[k]
+
+        h = (self._seconds[k + 1] - self._seconds[k])[:, None]
+        s = (seconds[:, None] - self._seconds[k, None]) / h
+        p0, p1 = self.positions[k], self.positions[k + 1]
+        m0, m1 = self.velocities[k] * h, self.velocities[k + 1] * h
+        s2, s3 = s * s, s * s * s
+        positions = (2 * s3 - 3 * s2 + 1) * p0 + (s3 - 2 * s2 + s) * m0 + (3 * s2 - 2 * s3) * p1 + (s3 - s2) * m1
+        velocities = ((6 * s2 - 6 * s) * (p0 - p1) + (3 * s2 - 4 * s + 1) * m0 + (3 * s2 - 2 * s) * m1) / h
+        return positions, velocities
+
+    def state(self, ep: float) -> GCRF:
+        """interpolate the state at an epoch
+
+        :param ep: modified julian day between the first and last node
+        :type ep: float
+        :return: interpolated inertial state
+        :rtype: GCRF
+        """
+        (position,), (velocity,) = self.sample(np.array([ep]))
+        return GCRF(Epoch(ep), Vector3D(*position.tolist()), Vector3D(*velocity.tolist()))
+
+
+#: chronologically ordered states or the interpolated ephemeris of a trajectory
+Trajectory = TypeVar("Trajectory", bound=Union[List[GCRF], Ephemeris])
+
+
+class EphemerisStore:
+
+    #: Number of trajectories retained before the least recently used is evicted
+    DEFAULT_CAPACITY: int = 64
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY) -> None:
+        """class used to retain propagated trajectories so they can be shared between pages
+
+        :param capacity: maximum number of trajectories held in memory
+        :type capacity: int
+        """
+        #: maximum number of trajectories held in memory
+        self.capacity: int = capacity
+
+        #: number of lookups satisfied without propagating
+        self.hits: int = 0
+
+        #: number of lookups that required a propagation
+        self.misses: int = 0
+
+        self._entries: "OrderedDict[Hashable, Trajectory]" = OrderedDict()
+        self._lock: Lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def fetch(self, key: Hashable, propagate: Callable[[], "Trajectory"]) -> "Trajectory":
+        """retrieve the trajectory stored under key or propagate and store it when missing
+
+        :param key: hash of the inputs that define the trajectory
+        :type key: Hashable
+        :param propagate: function that produces the trajectory when it is not stored
+        :type propagate: Callable[[], Trajectory]
+        :return: chronologically ordered states or the interpolated ephemeris of the trajectory
+        :rtype: Trajectory
+        """
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+
+        states = propagate()
+
+        with self._lock:
+            self._entries[key] = states
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+        return states
+
+    def clear(self) -> None:
+        """remove all stored trajectories and reset the hit counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+#: trajectories shared by every page of the application
+store: EphemerisStore = EphemerisStore()
+metrics.registry.caches["ephemeris"] = store
+
+
+def scenario_key(*values: float) -> str:
+    """create a hash used to identify a trajectory from the values that define it
+
+    :return: hex digest of the argument values
+    :rtype: str
+    """
+    return sha1(repr(tuple(float(v) for v in values)).encode()).hexdigest()
+
+
+def scenario_states(
+    x: float,
+    y: float,
+    z: float,
+    vx: float,
+    vy: float,
+    vz: float,
+    tgt_ep: float,
+    r: float,
+    i: float,
+    c: float,
+    vr: float,
+    vi: float,
+    vc: float,
+) -> Tuple[GCRF, GCRF]:
+    """build the target and chase inertial states from the dashboard stores
+
+    :return: target and chase states valid at the target epoch
+    :rtype: Tuple[GCRF, GCRF]
+    """
+    tgt = GCRF(Epoch(tgt_ep), Vector3D(x, y, z), Vector3D(vx, vy, vz))
+    chase = StateConvert.hcw.to_gcrf(HCW.from_state_vector(Vector6D(r, i, c, vr, vi, vc)), tgt)
+    return tgt, chase
+
+
+def hill_offset(
+    target: Sequence[float], chase: Sequence[float], tgt_ep: float
+) -> Tuple[float, float, float, float, float, float]:
+    """express a chase inertial state in the hill frame of the target
+
+    :param target: GCRF target state in km and km/s
+    :type target: Sequence[float]
+    :param chase: GCRF chase state in km and km/s valid at the same epoch
+    :type chase: Sequence[float]
+    :param tgt_ep: epoch of both states in modified julian days
+    :type tgt_ep: float
+    :return: radial, in-track and cross-track position in km and velocity in km/s
+    :rtype: Tuple[float, float, float, float, float, float]
+    """
+    ep = Epoch(tgt_ep)
+    tgt = GCRF(ep, Vector3D(*target[:3]), Vector3D(*target[3:]))
+    hcw = StateConvert.gcrf.to_hcw(tgt, GCRF(ep, Vector3D(*chase[:3]), Vector3D(*chase[3:])))
+    return hcw.position.x, hcw.position.y, hcw.position.z, hcw.velocity.x, hcw.velocity.y, hcw.velocity.z
+
+
+def propagate(
+    state: GCRF, span: float, checkpoint: Optional[Callable[[], None]] = None, step: float = DISPLAY_STEP
+) -> List[GCRF]:
+    """step a spacecraft away from its initial state and record the state after every step
+
+    :param state: initial inertial state of the spacecraft
+    :type state: GCRF
+    :param span: number of days to propagate, negative values propagate backward
+    :type span: float
+    :param checkpoint: called before every step, may raise to abandon the propagation
+    :type checkpoint: Optional[Callable[[], None]]
+    :param step: seconds between the recorded states, the dense trajectories use the step of the spacecraft propagator
+    :type step: float
+    :return: chronologically ordered states excluding the initial state
+    :rtype: List[GCRF]
+    """
+    sc = Spacecraft(state)
+    sc.propagator.step_size = step
+    num_steps = round(abs(span) * SECONDS_IN_DAY / step)
+    if span < 0:
+        sc.propagator.step_size = -step
+
+    states = []
+    for _ in range(num_steps):
+        if checkpoint:
+            checkpoint()
+        sc.propagator.step()
+        states.append(sc.current_state())
+    metrics.registry.add_steps(num_steps)
+
+    if span < 0:
+        states.reverse()
+
+    return states
+
+
+def display_epochs(tgt_ep: float, span: float, step: float = DISPLAY_STEP) -> np.ndarray:
+    """create the epochs at which trajectories are drawn
+
+    :param tgt_ep: modified julian day of the first sample
+    :type tgt_ep: float
+    :param span: number of days covered by the samples, negative values sample backward
+    :type span: float
+    :param step: seconds between samples
+    :type step: float
+    :return: modified julian days in chronological order of shape (n + 1,) where n is span over step
+    :rtype: np.ndarray
+    """
+    epochs = tgt_ep + np.arange(round(abs(span) * SECONDS_IN_DAY / step) + 1) * np.copysign(step, span) / SECONDS_IN_DAY
+    return np.sort(epochs)
+
+
+def _rows(states: List[GCRF]) -> np.ndarray:
+    return np.array(
+        [
+            (s.epoch.value, s.position.x, s.position.y, s.position.z, s.velocity.x, s.velocity.y, s.velocity.z)
+            for s in states
+        ]
+    ).reshape(-1, 7)
+
+
+def _archived(kind: str, values: Sequence[float], propagate: Callable[[], List[GCRF]]) -> List[GCRF]:
+    # trajectories are written to disk as rows of epoch, position and velocity and rebuilt when read
+    rows = archive.store.fetch(kind, values, lambda: _rows(propagate()))
+    return [GCRF(Epoch(row[0]), Vector3D(*row[1:4]), Vector3D(*row[4:])) for row in rows.tolist()]
+
+
+def target_ephemeris(
+    x: float,
+    y: float,
+    z: float,
+    vx: float,
+    vy: float,
+    vz: float,
+    tgt_ep: float,
+    span: float,
+    checkpoint: Optional[Callable[[], None]] = None,
+) -> List[GCRF]:
+    """retrieve the target trajectory over the argument span
+
+    :param checkpoint: passed to propagate when the trajectory is not stored
+    :type checkpoint: Optional[Callable[[], None]]
+
+    :return: chronologically ordered target states
+    :rtype: List[GCRF]
+    """
+    values = (x, y, z, vx, vy, vz, tgt_ep, span)
+    tgt = GCRF(Epoch(tgt_ep), Vector3D(x, y, z), Vector3D(vx, vy, vz))
+    return store.fetch(
+        scenario_key(*values), lambda: _archived("target", values, lambda: propagate(tgt, span, checkpoint))
+    )
+
+
+def chase_ephemeris(
+    x: float,
+    y: float,
+    z: float,
+    vx: float,
+    vy: float,
+    vz: float,
+    tgt_ep: float,
+    r: float,
+    i: float,
+    c: float,
+    vr: float,
+    vi: float,
+    vc: float,
+    span: float,
+    checkpoint: Optional[Callable[[], None]] = None,
+) -> List[GCRF]:
+    """retrieve the chase trajectory over the argument span
+
+    :param checkpoint: passed to propagate when the trajectory is not stored
+    :type checkpoint: Optional[Callable[[], None]]
+
+    :return: chronologically ordered chase states
+    :rtype: List[GCRF]
+    """
+    values = (x, y, z, vx, vy, vz, tgt_ep, r, i, c, vr, vi, vc, span)
+    _, chase = scenario_states(x, y, z, vx, vy, vz, tgt_ep, r, i, c, vr, vi, vc)
+    return store.fetch(
+        scenario_key(*values), lambda: _archived("chase", values, lambda: propagate(chase, span, checkpoint))
+    )
+
+
+def _path(initial: GCRF, states: List[GCRF], span: float, error: float = 0) -> Ephemeris:
+    return Ephemeris.from_rows(_rows(states + [initial] if span < 0 else [initial] + states), error)
+
+
+def coarse_propagate(
+    state: GCRF, span: float, tolerance: float = PATH_TOLERANCE, checkpoint: Optional[Callable[[], None]] = None
+) -> Optional[Ephemeris]:
+    """propagate a spacecraft with the longest node step whose ephemeris stays within a tolerance of the dense loop
+
+    the whole span is propagated with a node step and with twice the step. the difference of both runs over fifteen
+    estimates the global error of the finer run, and the hermite cubics through every other node of the finer run
+    checked against the nodes they skip over sixteen estimate the interpolation error between its nodes. the step is
+    halved until the sum of both estimates is within the tolerance, and the search gives up once the step it predicts
+    from the fourth order convergence of both errors is no longer than the dense step.
+
+    :param state: initial inertial state of the spacecraft
+    :type state: GCRF
+    :param span: number of days to propagate, negative values propagate backward
+    :type span: float
+    :param tolerance: largest position error in km accepted against the dense trajectory
+    :type tolerance: float
+    :param checkpoint: called before every step, may raise to abandon the propagation
+    :type checkpoint: Optional[Callable[[], None]]
+    :return: ephemeris whose nodes include the initial state, None when only the dense step meets the tolerance
+    :rtype: Optional[Ephemeris]
+    """
+    total = abs(span) * SECONDS_IN_DAY
+    nodes = max(1, ceil(total / MAX_NODE_STEP / 2))
+    coarse = _path(state, propagate(state, span, checkpoint, total / nodes), span)
+    while total / nodes / 2 > DISPLAY_STEP:
+        nodes *= 2
+        fine = _path(state, propagate(state, span, checkpoint, total / nodes), span)
+        integration = np.linalg.norm(fine.positions[::2] - coarse.positions, axis=1).max() / 15
+        midpoints, _ = Ephemeris.from_rows(fine.rows()[::2]).sample(fine.epochs[1::2])
+        interpolation = np.linalg.norm(midpoints - fine.positions[1::2], axis=1).max() / 16
+        error = integration + interpolation
+        if error <= tolerance:
+            fine.error = error
+            return fine
+        if total / nodes * (tolerance / error) ** 0.25 <= DISPLAY_STEP:
+            break
+        coarse = fine
+    return None
+
+
+def _archived_path(kind: str, values: Sequence[float], propagate: Callable[[], Ephemeris]) -> Ephemeris:
+    def solve() -> Tuple[np.ndarray, float]:
+        path = propagate()
+        return path.rows(), path.error
+
+    return Ephemeris.from_rows(*archive.store.fetch(kind, values, solve))
+
+
+def target_path(
+    x: float,
+    y: float,
+    z: float,
+    vx: float,
+    vy: float,
+    vz: float,
+    tgt_ep: float,
+    span: float,
+    checkpoint: Optional[Callable[[], None]] = None,
+) -> Ephemeris:
+    """retrieve the coarse target ephemeris over the argument span, falling back to the states of target_ephemeris
+    when no node step longer than the dense step meets PATH_TOLERANCE
+
+    :param checkpoint: passed to coarse_propagate and propagate when the ephemeris is not stored
+    :type checkpoint: Optional[Callable[[], None]]
+
+    :return: target ephemeris starting at the target epoch
+    :rtype: Ephemeris
+    """
+    values = (x, y, z, vx, vy, vz, tgt_ep, span, PATH_TOLERANCE)
+    tgt = GCRF(Epoch(tgt_ep), Vector3D(x, y, z), Vector3D(vx, vy, vz))
+
+    def solve() -> Ephemeris:
+        path = coarse_propagate(tgt, span, PATH_TOLERANCE, checkpoint)
+        return path or _path(tgt, target_ephemeris(x, y, z, vx, vy, vz, tgt_ep, span, checkpoint), span)
+
+    return store.fetch(scenario_key(*values), lambda: _archived_path("target-path", values, solve))
+
+
+def chase_path(
+    x: float,
+    y: float,
+    z: float,
+    vx: float,
+    vy: float,
+    vz: float,
+    tgt_ep: float,
+    r: float,
+    i: float,
+    c: float,
+    vr: float,
+    vi: float,
+    vc: float,
+    span: float,
+    checkpoint: Optional[Callable[[], None]] = None,
+) -> Ephemeris:
+    """retrieve the coarse chase ephemeris over the argument span, falling back to the states of chase_ephemeris
+    when no node step longer than the dense step meets PATH_TOLERANCE
+
+    :param checkpoint: passed to coarse_propagate and propagate when the ephemeris is not stored
+    :type checkpoint: Optional[Callable[[], None]]
+
+    :return: chase ephemeris starting at the target epoch
+    :rtype: Ephemeris
+    """
+    values = (x, y, z, vx, vy, vz, tgt_ep, r, i, c, vr, vi, vc, span, PATH_TOLERANCE)
+    _, chase = scenario_states(x, y, z, vx, vy, vz, tgt_ep, r, i, c, vr, vi, vc)
+
+    def solve() -> Ephemeris:
+        path = coarse_propagate(chase, span, PATH_TOLERANCE, checkpoint)
+        return path or _path(
+            chase, chase_ephemeris(x, y, z, vx, vy, vz, tgt_ep, r, i, c, vr, vi, vc, span, checkpoint), span
+        )
+
+    return store.fetch(scenario_key(*values), lambda: _archived_path("chase-path", values, solve))
+
+
+def scenario_paths(
+    x: float,
+    y: float,
+    z: float,
+    vx: float,
+    vy: float,
+    vz: float,
+    tgt_ep: float,
+    r: float,
+    i: float,
+    c: float,
+    vr: float,
+    vi: float,
+    vc: float,
+    span: float,
+) -> Tuple[Ephemeris, Ephemeris]:
+    """retrieve the target and chase ephemerides of a scenario, the job the inertial page runs in a worker
+
+    :return: target and chase ephemerides starting at the target epoch
+    :rtype: Tuple[Ephemeris, Ephemeris]
+    """
+    return (
+        target_path(x, y, z, vx, vy, vz, tgt_ep, span),
+        chase_path(x, y, z, vx, vy, vz, tgt_ep, r, i, c, vr, vi, vc, span),
+    )
+
+
+def positions(states: List[GCRF]) -> np.ndarray:
+    """collect the position of every state of a trajectory
+
+    :param states: chronologically ordered states
+    :type states: List[GCRF]
+    :return: positions of shape (len(states), 3) in km
+    :rtype: np.ndarray
+    """
+    return np.array([(s.position.x, s.position.y, s.position.z) for s in states]).reshape(-1, 3)
+
+
+def velocities(states: List[GCRF]) -> np.ndarray:
+    """collect the velocity of every state of a trajectory
+
+    :param states: chronologically ordered states
+    :type states: List[GCRF]
+    :return: velocities of shape (len(states), 3) in km/s
+    :rtype: np.ndarray
+    """
+    return np.array([(s.velocity.x, s.velocity.y, s.velocity.z) for s in states]).reshape(-1, 3)
+
+
+def replay(sc: Spacecraft, state: GCRF) -> None:
+    """place a spacecraft at a stored state instead of stepping its propagator
+
+    :param sc: spacecraft to be moved
+    :type sc: Spacecraft
+    :param state: stored state the spacecraft should assume
+    :type state: GCRF
+    """
+    sc.propagator.state = state.copy()
@@ -0,0 +1,267 @@
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from openspace.bodies.artificial import Spacecraft
+from openspace.coordinates.states import GCRF
+from openspace.math.constants import SECONDS_IN_DAY
+from openspace.math.linalg import Vector3D
+from openspace.time import Epoch
+
+from openspace_app import archive, jobs
+from openspace_app.ephemeris import (
+    FUTURE_SPAN,
+    PAST_SPAN,
+    chase_ephemeris,
+    replay,
+    scenario_states,
+    target_ephemeris,
+)
+
+#: Error in km applied to each target position component to seed the filter
+SEED_OFFSET: float = 0.5
+
+#: Number of filter steps between calls to the progress function of filter_history
+PROGRESS_STEPS: int = 24
+
+#: Standard deviation of each relative position component in km and velocity component in km/s of Monte Carlo runs
+STATE_SIGMA: Tuple[float, float] = (0.1, 1e-5)
+
+#: Number of Monte Carlo runs solved by one job
+STUDY_CHUNK: int = 8
+
+#: Target state, perturbed relative states and filter seed errors of the runs of one Monte Carlo job
+Chunk = Tuple[Tuple[float, ...], np.ndarray, np.ndarray]
+
+
+def _window(past: List[GCRF], state: GCRF, future: List[GCRF]) -> List[GCRF]:
+    # the filter window is centered on the target epoch so only half of the future span is used
+    return past[1:] + [state] + future[: len(past)]
+
+
+def filter_history(
+    x: float,
+    y: float,
+    z: float,
+    vx: float,
+    vy: float,
+    vz: float,
+    tgt_ep: float,
+    r: float,
+    i: float,
+    c: float,
+    vr: float,
+    vi: float,
+    vc: float,
+    seed_error: Sequence[float] = (SEED_OFFSET, SEED_OFFSET, SEED_OFFSET),
+    progress: Optional[Callable[[np.ndarray, np.ndarray], None]] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """track the target with the chase wfov over one day centered on the target epoch
+
+    histories are kept in the archive so the noisy observations of a scenario are only drawn the first time it is
+    solved and later calls replay them
+
+    :param seed_error: error in km of each target position component used to seed the filter
+    :type seed_error: Sequence[float]
+    :param progress: called with the true and estimated positions solved so far every PROGRESS_STEPS filter steps,
+        never called when the history is read from the archive
+    :type progress: Optional[Callable[[np.ndarray, np.ndarray], None]]
+    :return: true and estimated hill positions of the chase relative to the target, each of shape (n, 3)
+    :rtype: Tuple[np.ndarray, np.ndarray]
+    """
+    values = (x, y, z, vx, vy, vz, tgt_ep, r, i, c, vr, vi, vc)
+    return archive.store.fetch("wfov", (*values, *seed_error), lambda: _history(values, seed_error, progress))
+
+
+def history_rows(
+    x: float,
+    y: float,
+    z: float,
+    vx: float,
+    vy: float,
+    vz: float,
+    tgt_ep: float,
+    r: float,
+    i: float,
+    c: float,
+    vr: float,
+    vi: float,
+    vc: float,
+) -> np.ndarray:
+    """collect every step of the filter history of a scenario for export, the plots only draw a decimated copy
+
+    :return: hours from the target epoch followed by the true and estimated hill positions in km of every filter step
+        of shape (n, 7)
+    :rtype: np.ndarray
+    """
+    truth, observed = filter_history(x, y, z, vx, vy, vz, tgt_ep, r, i, c, vr, vi, vc)
+    tgt_state = GCRF(Epoch(tgt_ep), Vector3D(x, y, z), Vector3D(vx, vy, vz))
+    tgt_past = target_ephemeris(x, y, z, vx, vy, vz, tgt_ep, PAST_SPAN)
+    tgt_future = target_ephemeris(x, y, z, vx, vy, vz, tgt_ep, FUTURE_SPAN)
+    days = np.array([state.epoch.value for state in _window(tgt_past, tgt_state, tgt_future)])
+    return np.column_stack([(days - tgt_ep) * SECONDS_IN_DAY / 3600, truth, observed])
+
+
+def _history(
+    values: Sequence[float],
+    seed_error: Sequence[float],
+    progress: Optional[Callable[[np.ndarray, np.ndarray], None]],
+) -> Tuple[np.ndarray, np.ndarray]:
+    x, y, z, vx, vy, vz, tgt_ep, r, i, c, vr, vi, vc = values
+    ep = Epoch(tgt_ep)
+    tgt_state, chase_state = scenario_states(x, y, z, vx, vy, vz, tgt_ep, r, i, c, vr, vi, vc)
+    tgt_past = target_ephemeris(x, y, z, vx, vy, vz, tgt_ep, PAST_SPAN)
+    tgt_future = target_ephemeris(x, y, z, vx, vy, vz, tgt_ep, FUTURE_SPAN)
+    chase_past = chase_ephemeris(x, y, z, vx, vy, vz, tgt_ep, r, i, c, vr, vi, vc, PAST_SPAN)
+    chase_future = chase_ephemeris(x, y, z, vx, vy, vz, tgt_ep, r, i, c, vr, vi, vc, FUTURE_SPAN)
+
+    tgt_states = _window(tgt_past, tgt_state, tgt_future)
+    chase_states = _window(chase_past, chase_state, chase_future)
+    tgt = Spacecraft(tgt_past[0])
+    chase = Spacecraft(chase_past[0])
+
+    dx, dy, dz = seed_error
+    seed = Spacecraft(GCRF(ep, Vector3D(x + dx, y + dy, z + dz), Vector3D(vx, vy, vz)))
+    seed.step_to_epoch(ep.plus_days(PAST_SPAN))
+    chase.acquire(seed)
+
+    truth, observed = np.empty((len(tgt_states), 3)), np.empty((len(tgt_states), 3))
+    for k, (tgt_step, chase_step) in enumerate(zip(tgt_states, chase_states)):
+        replay(tgt, tgt_step)
+        replay(chase, chase_step)
+        chase.process_wfov(tgt)
+
+        rel_truth = tgt.hill_position(chase)
+        estimate = chase.filter.propagator.state.position
+        truth[k] = rel_truth.x, rel_truth.y, rel_truth.z
+        observed[k] = -estimate.x, -estimate.y, -estimate.z
+        if progress and (k + 1) % PROGRESS_STEPS == 0:
+            progress(truth[: k + 1], observed[: k + 1])
+
+    return truth, observed
+
+
+def _run_error(run: Tuple[Sequence[float], Sequence[float]]) -> np.ndarray:
+    values, seed_error = run
+    truth, observed = filter_history(*values, seed_error=seed_error)
+    return observed - truth
+
+
+def study_chunks(
+    x: float,
+    y: float,
+    z: float,
+    vx: float,
+    vy: float,
+    vz: float,
+    tgt_ep: float,
+    r: float,
+    i: float,
+    c: float,
+    vr: float,
+    vi: float,
+    vc: float,
+    runs: int,
+    seed: Optional[int] = None,
+) -> List[Chunk]:
+    """draw the perturbed filter seeds and initial relative states of a Monte Carlo study in jobs of STUDY_CHUNK runs
+
+    :param runs: number of perturbed scenarios
+    :type runs: int
+    :param seed: seed of the random perturbations
+    :type seed: Optional[int]
+    :return: arguments of chunk_errors for every job
+    :rtype: List[Chunk]
+    """
+    rng = np.random.default_rng(seed)
+    seed_errors = rng.normal(0, SEED_OFFSET, (runs, 3))
+    offsets = np.array([r, i, c, vr, vi, vc]) + rng.normal(0, 1, (runs, 6)) * np.repeat(STATE_SIGMA, 3)
+
+    target = (x, y, z, vx, vy, vz, tgt_ep)
+    chunks = []
+    for start in range(0, runs, STUDY_CHUNK):
+        stop = start + STUDY_CHUNK
+        chunks.append((target, offsets[start:stop], seed_errors[start:stop]))
+    return chunks
+
+
+def chunk_errors(chunk: Chunk) -> Tuple[np.ndarray, np.ndarray]:
+    """solve the runs of one job of a Monte Carlo study
+
+    :param chunk: target state, perturbed relative states and filter seed errors of the runs
+    :type chunk: Chunk
+    :return: epochs of the filter window in modified julian days of shape (n,) and the estimated minus true hill
+        position in km of every run of shape (runs, n, 3)
+    :rtype: Tuple[np.ndarray, np.ndarray]
+    """
+    target, offsets, seed_errors = chunk
+    x, y, z, vx, vy, vz, tgt_ep = target
+
+    # the target trajectory is shared by every run so it is read from the archive once and kept in memory
+    tgt_state = GCRF(Epoch(tgt_ep), Vector3D(x, y, z), Vector3D(vx, vy, vz))
+    tgt_past = target_ephemeris(x, y, z, vx, vy, vz, tgt_ep, PAST_SPAN)
+    tgt_future = target_ephemeris(x, y, z, vx, vy, vz, tgt_ep, FUTURE_SPAN)
+    days = np.array([state.epoch.value for state in _window(tgt_past, tgt_state, tgt_future)])
+
+    # perturbed runs are never repeated so their trajectories and histories are kept out of the archive
+    enabled, archive.store.enabled = archive.store.enabled, False
+    try:
+        errors = [_run_error(((*target, *offset), tuple(error))) for offset, error in zip(offsets, seed_errors)]
+    finally:
+        archive.store.enabled = enabled
+    return days, np.stack(errors)
+
+
+def summarize(
+    tgt_ep: float, results: Sequence[Tuple[np.ndarray, np.ndarray]]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """combine the jobs of a Monte Carlo study into the statistics drawn on the estimation page
+
+    :param tgt_ep: epoch of the scenario in modified julian days
+    :type tgt_ep: float
+    :param results: epochs and errors returned by chunk_errors for every job
+    :type results: Sequence[Tuple[np.ndarray, np.ndarray]]
+    :return: hours from the target epoch of shape (n,) followed by the mean and standard deviation of the estimated
+        minus true hill position in km, each of shape (n, 3)
+    :rtype: Tuple[np.ndarray, np.ndarray, np.ndarray]
+    """
+    days = results[0][0]
+    errors = np.concatenate([errors for _, errors in results])
+    hours = (days - tgt_ep) * SECONDS_IN_DAY / 3600
+    return hours, errors.mean(axis=0), errors.std(axis=0, ddof=1 if len(errors) > 1 else 0)
+
+
+def monte_carlo(
+    x: float,
+    y: float,
+    z: float,
+    vx: float,
+    vy: float,
+    vz: float,
+    tgt_ep: float,
+    r: float,
+    i: float,
+    c: float,
+    vr: float,
+    vi: float,
+    vc: float,
+    runs: int,
+    seed: Optional[int] = None,
+    name: str = "estimation.monte_carlo",
+    checkpoint: Optional[Callable[[], None]] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """repeat filter_history with perturbed filter seeds and initial relative states on the job workers
+
+    :param runs: number of perturbed scenarios
+    :type runs: int
+    :param seed: seed of the random perturbations
+    :type seed: Optional[int]
+    :param name: name of the callback the jobs are counted against
+    :type name: str
+    :param checkpoint: called between jobs, may raise to stop the study and drop the remaining runs
+    :type checkpoint: Optional[Callable[[], None]]
+    :return: hours from the target epoch of shape (n,) followed by the mean and standard deviation of the estimated
+        minus true hill position in km, each of shape (n, 3)
+    :rtype: Tuple[np.ndarray, np.ndarray, np.ndarray]
+    """
+    chunks = study_chunks(x, y, z, vx, vy, vz, tgt_ep, r, i, c, vr, vi, vc, runs, seed)
+    return summarize(tgt_ep, jobs.executor.map(name, chunk_errors, chunks, checkpoint))
@@ -0,0 +1,564 @@
+import _thread
+import os
+import signal
+import time
+import tracemalloc
+from collections import defaultdict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from multiprocessing import get_all_start_methods, get_context
+from threading import Condition, Event, Lock, Thread, Timer
+from typing import Any, Callable, Deque, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import flask
+from dash import DiskcacheManager
+
+from openspace_app import metrics
+
+#: Number of worker processes shared by the CPU-bound callbacks of one server process, None uses every core
+WORKERS: Optional[int] = None
+
+#: Number of jobs allowed to wait for a free worker before new jobs are rejected
+QUEUE_LIMIT: int = 16
+
+#: Largest fraction of the workers and queue one callback may hold so a busy page cannot starve the others
+SHARE: float = 0.5
+
+#: Seconds a job may run before it is stopped
+TIMEOUT: float = 120
+
+#: Seconds a new job waits for a free slot before it is rejected
+ADMISSION_WAIT: float = 1
+
+#: Seconds between checks of whether a caller still wants the result of its job
+POLL_INTERVAL: float = 0.1
+
+#: Seconds the server waits past the timeout for a worker to stop a job before it gives up on the job itself
+TIMEOUT_GRACE: float = 1
+
+#: How worker processes are started, a forkserver never forks a threaded server but it is missing on windows
+START_METHOD: str = "forkserver" if "forkserver" in get_all_start_methods() else "spawn"
+
+
+class Rejected(RuntimeError):
+    def __init__(self, name: str, retry_after: int) -> None:
+        """exception raised when a job is refused because the workers and their queue are full
+
+        :param name: name of the callback whose job was refused
+        :type name: str
+        :param retry_after: seconds the client should wait before trying again
+        :type retry_after: int
+        """
+        super().__init__("the server is busy, %s was not started, please retry in %d seconds" % (name, retry_after))
+
+        #: name of the callback whose job was refused
+        self.name: str = name
+
+        #: seconds the client should wait before trying again
+        self.retry_after: int = retry_after
+
+
+def _call(timeout: float, function: Callable, args: Sequence) -> Tuple[Any, Dict[str, int], int]:
+    # runs in a worker and returns the counters the job added so the metrics of the server include its workers, and
+    # the peak of the memory the job allocated when the worker traces memory
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.clear_traces()
+    before = metrics.registry.counts()
+    result = _limited(timeout, function, args)
+    after = metrics.registry.counts()
+    counts = {key: value - before.get(key, 0) for key, value in after.items() if value != before.get(key, 0)}
+    return result, counts, tracemalloc.get_traced_memory()[1] if tracing else 0
+
+
+def _limited(timeout: float, function: Callable, args: Sequence) -> Any:
+    # stops pure python loops at the timeout so a stuck job frees its worker
+    if not hasattr(signal, "setitimer"):
+        return _interrupted(timeout, function, args)
+
+    def expire(signum: int, frame: Any) -> None:
+        raise TimeoutError("the job exceeded its limit of %g seconds" % timeout)
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return function(*args)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _interrupted(timeout: float, function: Callable, args: Sequence) -> Any:
+    # platforms without interval timers interrupt the main thread of the worker from a timer thread instead
+    lock = Lock()
+    state = {"running": True, "fired": False}
+
+    def expire() -> None:
+        with lock:
+            if state["running"]:
+                state["fired"] = True
+                _thread.interrupt_main()
+
+    timer = Timer(timeout, expire)
+    timer.daemon = True
+    timer.start()
+    try:
+        result = function(*args)
+    except KeyboardInterrupt:
+        with lock:
+            state["running"] = False
+        if state["fired"]:
+            raise TimeoutError("the job exceeded its limit of %g seconds" % timeout) from None
+        raise
+    finally:
+        timer.cancel()
+
+    with lock:
+        state["running"] = False
+    if state["fired"]:
+        # the job finished as the timer fired, the pending interrupt is consumed so it cannot stop the worker
+        try:
+            while True:
+                time.sleep(POLL_INTERVAL)
+        except KeyboardInterrupt:
+            pass
+    return result
+
+
+class Executor:
+    def __init__(
+        self,
+        workers: Optional[int] = WORKERS,
+        queue_limit: int = QUEUE_LIMIT,
+        timeout: float = TIMEOUT,
+        share: float = SHARE,
+    ) -> None:
+        """class used to run the CPU-bound jobs of every request on one bounded pool of worker processes
+
+        a job holds a slot from submission until it finishes, there are as many slots as workers plus the queue
+        limit and one callback may hold at most the share of them. jobs wait in the executor and are only handed to
+        the pool when a worker is free, so a running future has started and its timeout is checked from the server as
+        well as in the worker. the pool is created on first use with START_METHOD.
+
+        :param workers: number of worker processes, None uses every core
+        :type workers: Optional[int]
+        :param queue_limit: number of jobs allowed to wait for a free worker
+        :type queue_limit: int
+        :param timeout: seconds a job may run before it is stopped
+        :type timeout: float
+        :param share: largest fraction of the slots one callback may hold
+        :type share: float
+        """
+        #: number of worker processes
+        self.workers: int = workers or os.cpu_count() or 1
+
+        #: number of jobs allowed to wait for a free worker
+        self.queue_limit: int = queue_limit
+
+        #: seconds a job may run before it is stopped
+        self.timeout: float = timeout
+
+        #: largest fraction of the slots one callback may hold
+        self.share: float = share
+
+        #: number of jobs refused since the server started
+        self.rejected: int = 0
+
+        #: number of jobs that joined an identical job in progress instead of being submitted
+        self.shared: int = 0
+
+        #: most bytes allocated by one job since it was last reset, only measured in workers tracing memory
+        self.peak: int = 0
+
+        #: module level function called in every worker before its first job, e.g. archive.configure
+        self.initializer: Optional[Callable[..., None]] = None
+
+        #: arguments of the initializer
+        self.initargs: Tuple = ()
+
+        self._held: Dict[str, int] = defaultdict(int)
+        self._waiting: Deque[Tuple[Future, Callable, Sequence]] = deque()
+        self._busy: int = 0
+        self._condition: Condition = Condition()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._flights: Dict[Hashable, "_Flight"] = {}
+
+    @property
+    def capacity(self) -> int:
+        """number of jobs that may be running or queued at once"""
+        return self.workers + self.queue_limit
+
+    def configure(self, workers: Optional[int], queue_limit: int, timeout: float) -> None:
+        """change the size of the pool, the queue limit and the job timeout before jobs are submitted
+
+        :param workers: number of worker processes, None uses every core
+        :type workers: Optional[int]
+        :param queue_limit: number of jobs allowed to wait for a free worker
+        :type queue_limit: int
+        :param timeout: seconds a job may run before it is stopped
+        :type timeout: float
+        """
+        with self._condition:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False)
+                self._pool = None
+            self.workers = workers or os.cpu_count() or 1
+            self.queue_limit = queue_limit
+            self.timeout = timeout
+            self._condition.notify_all()
+
+    def acquire(self, name: str, wait: Optional[float] = ADMISSION_WAIT) -> None:
+        """reserve a slot for a job of a callback, waiting for one to free up when all are held
+
+        :param name: name of the callback submitting the job
+        :type name: str
+        :param wait: seconds to wait for a slot, None waits until one frees up
+        :type wait: Optional[float]
+        :raises Rejected: when no slot frees up in time
+        """
+        if not self._reserve(name, wait):
+            with self._condition:
+                self.rejected += 1
+            raise Rejected(name, max(1, round(ADMISSION_WAIT + POLL_INTERVAL)))
+
+    def _reserve(self, name: str, wait: Optional[float]) -> bool:
+        deadline = None if wait is None else time.monotonic() + wait
+        limit = max(1, int(self.capacity * self.share))
+        with self._condition:
+            while sum(self._held.values()) >= self.capacity or self._held[name] >= limit:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            self._held[name] += 1
+            return True
+
+    def release(self, name: str) -> None:
+        """free a slot reserved by acquire
+
+        :param name: name of the callback that submitted the job
+        :type name: str
+        """
+        with self._condition:
+            self._held[name] -= 1
+            self._condition.notify_all()
+
+    def pool(self) -> ProcessPoolExecutor:
+        """retrieve the worker processes, created on first use
+
+        :return: the pool
+        :rtype: ProcessPoolExecutor
+        """
+        with self._condition:
+            if self._pool is None:
+                context = get_context(START_METHOD)
+                if START_METHOD == "forkserver":
+                    # workers forked from a server that imported this module start in milliseconds, so the time a job
+                    # waits for a new worker barely counts against its timeout
+                    context.set_forkserver_preload([__name__])
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=context,
+                    initializer=self.initializer,
+                    initargs=self.initargs,
+                )
+            return self._pool
+
+    def discard(self, pool: ProcessPoolExecutor) -> None:
+        """replace a pool whose workers died so later jobs start new ones
+
+        :param pool: pool that raised BrokenProcessPool
+        :type pool: ProcessPoolExecutor
+        """
+        with self._condition:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False)
+
+    def submit(self, name: str, function: Callable, *args: Any, wait: Optional[float] = ADMISSION_WAIT) -> Future:
+        """schedule a job on the workers once a slot is free
+
+        :param name: name of the callback submitting the job
+        :type name: str
+        :param function: module level function run in a worker with the remaining arguments
+        :type function: Callable
+        :param wait: seconds to wait for a slot, None waits until one frees up
+        :type wait: Optional[float]
+        :raises Rejected: when no slot frees up in time
+        :return: future of the result, it raises TimeoutError when the job ran longer than the timeout
+        :rtype: Future
+        """
+        self.acquire(name, wait)
+        return self._enqueue(name, function, args)
+
+    def _enqueue(self, name: str, function: Callable, args: Sequence) -> Future:
+        # called with a slot held by name, the slot is released when the job finishes or is cancelled
+        future: Future = Future()
+        future.add_done_callback(lambda _: self.release(name))
+        with self._condition:
+            self._waiting.append((future, function, args))
+            self._dispatch()
+        return future
+
+    def _dispatch(self) -> None:
+        # called with the condition held, hands waiting jobs to free workers in submission order
+        while self._waiting and self._busy < self.workers:
+            future, function, args = self._waiting.popleft()
+            if not future.set_running_or_notify_cancel():
+                continue
+            future.started = time.monotonic()
+            pool = self.pool()
+            try:
+                try:
+                    job = pool.submit(_call, self.timeout, function, args)
+                except BrokenProcessPool:
+                    self.discard(pool)
+                    job = self.pool().submit(_call, self.timeout, function, args)
+            except BaseException as error:
+                future.set_exception(error)
+                continue
+            self._busy += 1
+            job.add_done_callback(partial(self._settle, future))
+
+    def _settle(self, future: Future, job: Future) -> None:
+        with self._condition:
+            self._busy -= 1
+            self._dispatch()
+        if job.cancelled():
+            future.set_exception(BrokenProcessPool("the pool running the job was shut down"))
+        elif job.exception() is not None:
+            future.set_exception(job.exception())
+        else:
+            result, counts, peak = job.result()
+            metrics.registry.absorb(counts)
+            self.peak = max(self.peak, peak)
+            future.set_result(result)
+
+    def run(
+        self,
+        name: str,
+        function: Callable,
+        *args: Any,
+        checkpoint: Optional[Callable[[], None]] = None,
+        key: Optional[Hashable] = None,
+    ) -> Any:
+        """run a job on the workers and wait for its result
+
+        :param name: name of the callback submitting the job
+        :type name: str
+        :param function: module level function run in a worker with the remaining arguments
+        :type function: Callable
+        :param checkpoint: called while waiting, may raise to stop waiting and drop the job if it has not started
+        :type checkpoint: Optional[Callable[[], None]]
+        :param key: hash of the inputs that define the result, callers passing the key of a job in progress wait for
+            it instead of submitting another, the job is dropped when every one of them stopped waiting
+        :type key: Optional[Hashable]
+        :raises Rejected: when no slot frees up in time
+        :raises TimeoutError: when the job ran longer than the timeout
+        :return: the result of the function
+        :rtype: Any
+        """
+        if key is None:
+            future = self.submit(name, function, *args)
+            try:
+                return self._result(name, future, checkpoint)
+            except BaseException:
+                future.cancel()
+                raise
+
+        with self._condition:
+            flight = self._flights.get(key)
+            owner = flight is None
+            if owner:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.shared += 1
+            flight.waiters += 1
+
+        try:
+            if owner:
+                try:
+                    flight.future = self.submit(name, function, *args)
+                    flight.future.add_done_callback(lambda _: self._land(key, flight))
+                except BaseException as error:
+                    flight.error = error
+                    self._land(key, flight)
+                    raise
+                finally:
+                    flight.ready.set()
+            else:
+                while not flight.ready.wait(POLL_INTERVAL):
+                    if checkpoint:
+                        checkpoint()
+                if flight.error is not None:
+                    raise flight.error
+            return self._result(name, flight.future, checkpoint)
+        finally:
+            with self._condition:
+                flight.waiters -= 1
+                abandoned = flight.waiters == 0 and self._flights.get(key) is flight
+                if abandoned:
+                    del self._flights[key]
+            if abandoned and flight.future is not None:
+                flight.future.cancel()
+
+    def map(
+        self,
+        name: str,
+        function: Callable,
+        items: Iterable[Any],
+        checkpoint: Optional[Callable[[], None]] = None,
+    ) -> List[Any]:
+        """run a job for every item, e.g. a chunk of a study, and wait for all of them
+
+        jobs are submitted while the callback holds less than its share of the slots, later items wait for earlier
+        items of the same call instead of being refused, and the remaining items are dropped when one of them fails or
+        the checkpoint raises
+
+        :param name: name of the callback submitting the jobs
+        :type name: str
+        :param function: module level function run in a worker with one item
+        :type function: Callable
+        :param items: arguments of the jobs
+        :type items: Iterable[Any]
+        :param checkpoint: called between items and while waiting, may raise to stop and drop the remaining items
+        :type checkpoint: Optional[Callable[[], None]]
+        :raises Rejected: when no slot frees up in time for the first item
+        :raises TimeoutError: when a job ran longer than the timeout
+        :return: the results of the function in the order of the items
+        :rtype: List[Any]
+        """
+        results: Dict[int, Any] = {}
+        futures: Deque[Tuple[int, Future]] = deque()
+        try:
+            for index, item in enumerate(items):
+                if checkpoint:
+                    checkpoint()
+                while futures and not self._reserve(name, 0):
+                    done, future = futures.popleft()
+                    results[done] = self._result(name, future, checkpoint)
+                if not futures:
+                    self.acquire(name)
+                futures.append((index, self._enqueue(name, function, (item,))))
+            while futures:
+                done, future = futures[0]
+                results[done] = self._result(name, future, checkpoint)
+                futures.popleft()
+        finally:
+            for _, future in futures:
+                future.cancel()
+        return [results[index] for index in range(len(results))]
+
+    def deadline(self, future: Future) -> float:
+        """find when the server gives up on a job its worker did not stop
+
+        :param future: future returned by submit
+        :type future: Future
+        :return: time.monotonic value the started job may run until, a job waiting for a worker has its whole limit
+            ahead of it
+        :rtype: float
+        """
+        started = getattr(future, "started", None)
+        return (time.monotonic() if started is None else started) + self.timeout + TIMEOUT_GRACE
+
+    def _land(self, key: Hashable, flight: "_Flight") -> None:
+        with self._condition:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def _result(self, name: str, future: Future, checkpoint: Optional[Callable[[], None]]) -> Any:
+        while True:
+            try:
+                return future.result(timeout=POLL_INTERVAL)
+            except FutureTimeout:
+                # the timeout of the worker raises the same exception as an unfinished poll
+                if future.done():
+                    raise
+                if checkpoint:
+                    checkpoint()
+                # the worker stops pure python jobs at the timeout, the server gives up on jobs it cannot stop
+                if time.monotonic() > self.deadline(future):
+                    raise TimeoutError("%s exceeded its limit of %g seconds" % (name, self.timeout))
+            except BrokenProcessPool:
+                self.discard(self.pool())
+                raise
+
+
+class _Flight:
+    def __init__(self) -> None:
+        # a job shared by every caller that ran it with the same key while it was in progress
+        self.ready: Event = Event()
+        self.future: Optional[Future] = None
+        self.error: Optional[BaseException] = None
+        self.waiters: int = 0
+
+
+#: jobs of every callback and API request of the current server process
+executor: Executor = Executor()
+
+
+class BoundedDiskcacheManager(DiskcacheManager):
+    def __init__(self, cache: Any, jobs: Executor = executor) -> None:
+        """class used to run background callbacks in their own processes while they hold a slot of an executor
+
+        a background job is refused like any other job when the slots are full and killed when it runs longer than
+        the timeout of the executor
+
+        :param cache: diskcache.Cache holding the results and progress of the jobs
+        :type cache: diskcache.Cache
+        :param jobs: executor whose slots and timeout bound the jobs
+        :type jobs: Executor
+        """
+        super().__init__(cache)
+
+        #: executor whose slots and timeout bound the jobs
+        self.jobs: Executor = jobs
+
+    def call_job_fn(self, key: str, job_fn: Callable, args: Any, context: Dict[str, Any]) -> int:
+        outputs = context.get("outputs_list") or {}
+        output = outputs[0] if isinstance(outputs, list) else outputs
+        name = "%s.%s" % (output.get("id", "background"), output.get("property", "job"))
+
+        self.jobs.acquire(name)
+        try:
+            pid = super().call_job_fn(key, job_fn, args, context)
+        except BaseException:
+            self.jobs.release(name)
+            raise
+        Thread(target=self._watch, args=(name, pid), daemon=True).start()
+        return pid
+
+    def _watch(self, name: str, pid: int) -> None:
+        import psutil
+
+        try:
+            psutil.Process(pid).wait(self.jobs.timeout)
+        except psutil.TimeoutExpired:
+            self.terminate_job(pid)
+        except psutil.NoSuchProcess:
+            pass
+        finally:
+            self.jobs.release(name)
+
+
+def register(server: flask.Flask) -> None:
+    """answer requests whose job was refused or ran too long with a json error instead of a server error
+
+    :param server: flask server hosting the application
+    :type server: flask.Flask
+    """
+
+    @server.errorhandler(Rejected)
+    def busy(error: Rejected) -> flask.Response:
+        response = flask.jsonify(error=str(error))
+        response.status_code = 503
+        response.headers["Retry-After"] = str(error.retry_after)
+        return response
+
+    @server.errorhandler(TimeoutError)
+    def expired(error: TimeoutError) -> flask.Response:
+        response = flask.jsonify(error=str(error))
+        response.status_code = 504
+        return response
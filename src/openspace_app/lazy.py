@@ -0,0 +1,64 @@
+import importlib.util
+import sys
+from threading import RLock
+from types import ModuleType
+from typing import Any, List
+
+#: modules that should only load once a callback needs them
+DEFERRED = (
+    "numpy",
+    "openspace.bodies.artificial",
+    "openspace.estimation.filtering",
+    "openspace.propagators.inertial",
+    "openspace.propagators.relative",
+    "plotly.graph_objs._layout",
+)
+
+#: modules created by lazy_import
+registry: List[ModuleType] = []
+
+_lock = RLock()
+
+
+class _DeferredModule(ModuleType):
+    # runs the module body on first attribute access, concurrent callers wait for it instead of reading a module
+    # whose body is still running, which importlib.util.LazyLoader allows before python 3.12
+    def __getattribute__(self, attr: str) -> Any:
+        namespace = object.__getattribute__(self, "__dict__")
+        with _lock:
+            if type(self) is _DeferredModule and not namespace.get("__loading__"):
+                namespace["__loading__"] = True
+                try:
+                    namespace["__spec__"].loader.exec_module(self)
+                    self.__class__ = ModuleType
+                finally:
+                    namespace.pop("__loading__", None)
+        return ModuleType.__getattribute__(self, attr)
+
+
+def lazy_import(name: str) -> ModuleType:
+    """create a module whose body only runs when one of its attributes is first accessed
+
+    :param name: absolute name of the module
+    :type name: str
+    :return: the module, already imported modules are returned unchanged
+    :rtype: ModuleType
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+
+    module = importlib.util.module_from_spec(spec)
+    module.__class__ = _DeferredModule
+    sys.modules[name] = module
+    registry.append(module)
+    return module
+
+
+def preload() -> None:
+    """run the body of every lazily imported module, used before forking worker processes"""
+    for module in registry:
+        dir(module)
@@ -0,0 +1,247 @@
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from functools import wraps
+from threading import Lock
+from typing import Any, Callable, Dict, List, Protocol
+
+import dash
+import flask
+
+#: Upper bounds in seconds of the callback latency histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+#: Path of the Prometheus endpoint
+ENDPOINT: str = "/metrics"
+
+
+class Cache(Protocol):
+    hits: int
+    misses: int
+
+    def __len__(self) -> int:
+        ...
+
+
+class Registry:
+    def __init__(self, buckets=BUCKETS) -> None:
+        """class used to accumulate the timing and traffic of page callbacks in one process
+
+        counters of work done by job workers are added with absorb when their results come back
+
+        :param buckets: upper bounds in seconds of the latency histogram buckets
+        :type buckets: Tuple[float, ...]
+        """
+        #: upper bounds in seconds of the latency histogram buckets
+        self.buckets = tuple(buckets)
+
+        #: caches reported by name
+        self.caches: Dict[str, Cache] = {}
+
+        self._counts: Dict[str, List[int]] = defaultdict(lambda: [0] * (len(self.buckets) + 1))
+        self._seconds: Dict[str, float] = defaultdict(float)
+        self._errors: Dict[str, int] = defaultdict(int)
+        self._in_flight: Dict[str, int] = defaultdict(int)
+        self._received: Dict[str, int] = defaultdict(int)
+        self._sent: Dict[str, int] = defaultdict(int)
+        self._steps: int = 0
+        self._absorbed: Dict[str, int] = defaultdict(int)
+        self._lock: Lock = Lock()
+
+    def start(self, name: str) -> None:
+        """count a callback run as in flight"""
+        with self._lock:
+            self._in_flight[name] += 1
+
+    def finish(self, name: str, seconds: float, failed: bool = False) -> None:
+        """record the duration of a callback run that is no longer in flight
+
+        :param name: name of the callback
+        :type name: str
+        :param seconds: duration of the run
+        :type seconds: float
+        :param failed: the run raised an exception other than PreventUpdate
+        :type failed: bool
+        """
+        with self._lock:
+            self._in_flight[name] -= 1
+            self._counts[name][bisect_left(self.buckets, seconds)] += 1
+            self._seconds[name] += seconds
+            if failed:
+                self._errors[name] += 1
+
+    def transfer(self, name: str, received: int, sent: int) -> None:
+        """record the size of a callback request and its response
+
+        :param name: name of the callback
+        :type name: str
+        :param received: bytes in the request body
+        :type received: int
+        :param sent: bytes in the response body
+        :type sent: int
+        """
+        with self._lock:
+            self._received[name] += received
+            self._sent[name] += sent
+
+    def add_steps(self, steps: int) -> None:
+        """count propagator steps taken while solving trajectories"""
+        with self._lock:
+            self._steps += steps
+
+    def counts(self) -> Dict[str, int]:
+        """read the counters a job worker hands back to the server with each result
+
+        :return: propagator steps under steps and cache lookups under <cache>.hits and <cache>.misses
+        :rtype: Dict[str, int]
+        """
+        with self._lock:
+            counts = {"steps": self._steps}
+        for name, cache in self.caches.items():
+            counts[name + ".hits"] = cache.hits
+            counts[name + ".misses"] = cache.misses
+        return counts
+
+    def absorb(self, counts: Dict[str, int]) -> None:
+        """add counters measured by a job worker to the ones of this process
+
+        :param counts: increase of the counters of the worker while it ran the job, keyed like counts
+        :type counts: Dict[str, int]
+        """
+        with self._lock:
+            for key, value in counts.items():
+                self._absorbed[key] += value
+
+    def render(self) -> str:
+        """format every metric in the Prometheus text exposition format
+
+        :return: metrics text ending with a newline
+        :rtype: str
+        """
+        lines = []
+
+        def family(metric: str, kind: str, description: str) -> None:
+            lines.append("# HELP %s %s" % (metric, description))
+            lines.append("# TYPE %s %s" % (metric, kind))
+
+        with self._lock:
+            metric = "openspace_callback_duration_seconds"
+            family(metric, "histogram", "Time spent running each page callback.")
+            for name, counts in sorted(self._counts.items()):
+                total = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    total += count
+                    lines.append('%s_bucket{callback="%s",le="%s"} %d' % (metric, name, _number(bound), total))
+                lines.append('%s_sum{callback="%s"} %s' % (metric, name, _number(self._seconds[name])))
+                lines.append('%s_count{callback="%s"} %d' % (metric, name, total))
+
+            for metric, kind, description, values in (
+                ("openspace_callback_errors_total", "counter", "Callback runs that raised.", self._errors),
+                ("openspace_callback_in_flight", "gauge", "Callback runs in progress.", self._in_flight),
+                ("openspace_callback_request_bytes_total", "counter", "Bytes of callback requests.", self._received),
+                ("openspace_callback_response_bytes_total", "counter", "Bytes of callback responses.", self._sent),
+            ):
+                family(metric, kind, description)
+                lines.extend('%s{callback="%s"} %d' % (metric, name, value) for name, value in sorted(values.items()))
+
+            family("openspace_propagation_steps_total", "counter", "Propagator steps taken to solve trajectories.")
+            lines.append("openspace_propagation_steps_total %d" % (self._steps + self._absorbed["steps"]))
+            absorbed = dict(self._absorbed)
+
+        names = sorted(set(self.caches) | {key.rsplit(".", 1)[0] for key in absorbed if key != "steps"})
+
+        for metric, kind, description, attribute in (
+            ("openspace_cache_hits_total", "counter", "Lookups answered from a cache.", "hits"),
+            ("openspace_cache_misses_total", "counter", "Lookups that had to be computed.", "misses"),
+            ("openspace_cache_entries", "gauge", "Entries held by a cache.", "__len__"),
+        ):
+            family(metric, kind, description)
+            for name in names:
+                cache = self.caches.get(name)
+                if attribute == "__len__":
+                    # entries held by the workers are not visible from the server
+                    if cache is not None:
+                        lines.append('%s{cache="%s"} %d' % (metric, name, len(cache)))
+                    continue
+                value = (getattr(cache, attribute) if cache is not None else 0) + absorbed.get(
+                    name + "." + attribute, 0
+                )
+                lines.append('%s{cache="%s"} %d' % (metric, name, value))
+
+        return "\n".join(lines) + "\n"
+
+
+def _number(value: float) -> str:
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+
+#: metrics of the current process
+registry: Registry = Registry()
+
+
+def callback_name(function: Callable) -> str:
+    """name a callback by its page and function, e.g. cw.update_plot
+
+    :param function: the callback function
+    :type function: Callable
+    :return: page module name and function name joined by a dot
+    :rtype: str
+    """
+    return "%s.%s" % (function.__module__.rsplit(".", 1)[-1], function.__name__)
+
+
+def callback(*args: Any, **kwargs: Any) -> Callable[[Callable], Callable]:
+    """register a dash callback whose runs are timed and counted in the registry
+
+    takes the same arguments as dash.callback
+
+    :return: decorator registering the function
+    :rtype: Callable[[Callable], Callable]
+    """
+
+    def decorator(function: Callable) -> Callable:
+        name = callback_name(function)
+
+        @wraps(function)
+        def timed(*call_args: Any, **call_kwargs: Any) -> Any:
+            registry.start(name)
+            start = time.perf_counter()
+            failed = False
+            try:
+                return function(*call_args, **call_kwargs)
+            except dash.exceptions.PreventUpdate:
+                raise
+            except Exception:
+                failed = True
+                raise
+            finally:
+                registry.finish(name, time.perf_counter() - start, failed)
+
+        return dash.callback(*args, **kwargs)(timed)
+
+    return decorator
+
+
+def register(server: flask.Flask, app: dash.Dash) -> None:
+    """serve the registry at ENDPOINT and count the bytes of every callback request
+
+    :param server: flask server hosting the application
+    :type server: flask.Flask
+    :param app: application whose callback requests are counted
+    :type app: dash.Dash
+    """
+
+    @server.after_request
+    def count_callback_bytes(response: flask.Response) -> flask.Response:
+        if flask.request.path.endswith("/_dash-update-component") and not response.direct_passthrough:
+            body = flask.request.get_json(silent=True) or {}
+            function = app.callback_map.get(body.get("output"), {}).get("callback")
+            if function is not None:
+                registry.transfer(
+                    callback_name(function), flask.request.content_length or 0, response.content_length or 0
+                )
+        return response
+
+    @server.route(ENDPOINT)
+    def metrics() -> flask.Response:
+        return flask.Response(registry.render(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,67 @@
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+#: Apparent diameter of the Moon in degrees
+MOON_SIZE: float = 0.52
+
+
+def field_of_view(d, flen, w, h) -> Dict[str, np.ndarray]:
+    """calculate the field of view and apparent moon size of telescope and sensor combinations
+
+    arguments may be scalars or arrays and are broadcast against each other
+
+    :param d: image circle diameter in mm
+    :param flen: focal length in mm
+    :param w: sensor width in mm
+    :param h: sensor height in mm
+    :return: arrays of the field of view, horizontal and vertical fields of view in degrees and moon diameter in mm
+        keyed by fov, fov_x, fov_y and moon
+    :rtype: Dict[str, np.ndarray]
+    """
+    d, flen, w, h = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (d, flen, w, h)))
+    fov = np.degrees(np.arctan(d / flen))
+    return {
+        "fov": fov,
+        "fov_x": w / d * fov,
+        "fov_y": h / d * fov,
+        "moon": MOON_SIZE / fov * d,
+    }
+
+
+def sweep(ranges: Sequence[np.ndarray]) -> Dict[str, np.ndarray]:
+    """evaluate field_of_view over every combination of the argument samples
+
+    :param ranges: samples of image circle diameter, focal length, sensor width and sensor height in that order
+    :type ranges: Sequence[np.ndarray]
+    :return: arrays keyed like field_of_view with one axis per parameter
+    :rtype: Dict[str, np.ndarray]
+    """
+    return field_of_view(*np.meshgrid(*ranges, indexing="ij", sparse=True))
+
+
+def plane(
+    bounds: Sequence[Tuple[float, float]], design: Sequence[float], x: int, y: int, samples: int
+) -> Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+    """sweep two parameters between their bounds while the others keep their design values
+
+    :param bounds: lower and upper bound of each parameter in the order used by sweep
+    :type bounds: Sequence[Tuple[float, float]]
+    :param design: value of each parameter held fixed when it is not swept
+    :type design: Sequence[float]
+    :param x: index of the parameter along the horizontal axis
+    :type x: int
+    :param y: index of the parameter along the vertical axis
+    :type y: int
+    :param samples: number of samples along each swept axis
+    :type samples: int
+    :return: samples of the horizontal and vertical parameters and arrays keyed like field_of_view of shape
+        (samples, samples) indexed by vertical then horizontal sample
+    :rtype: Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray]]
+    """
+    ranges = [
+        np.linspace(low, high, samples) if k in (x, y) else np.array([value], dtype=float)
+        for k, ((low, high), value) in enumerate(zip(bounds, design))
+    ]
+    grid = {key: np.moveaxis(values, (y, x), (0, 1)).reshape(samples, samples) for key, values in sweep(ranges).items()}
+    return ranges[x], ranges[y], grid
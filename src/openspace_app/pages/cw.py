@@ -1,24 +1,68 @@
 import dash_bootstrap_components as dbc
-import plotly.graph_objects as go
-from dash import callback, dcc, html, register_page
+from dash import Patch, ctx, dcc, html, no_update, register_page
 from dash.dependencies import Input, Output, State
-from openspace.coordinates.states import HCW
-from openspace.math.constants import BASE_IN_KILO, SECONDS_IN_DAY
-from openspace.math.linalg import Vector6D
-from openspace.propagators.relative import Hill
+from dash.exceptions import PreventUpdate
+from openspace.math.constants import BASE_IN_KILO
 
-from openspace_app.widgets import nav_column
+from openspace_app import jobs
+from openspace_app.lazy import lazy_import
+from openspace_app.metrics import callback
+from openspace_app.widgets import (
+    DARK_TEMPLATE,
+    HILL_LABELS,
+    HILL_PANELS,
+    INPUT_DEBOUNCE,
+    lite_view,
+    nav_column,
+    time_controls,
+)
+
+archive = lazy_import("openspace_app.archive")
+decimation = lazy_import("openspace_app.decimation")
+encoding = lazy_import("openspace_app.encoding")
+relative = lazy_import("openspace_app.relative")
+scenario = lazy_import("openspace_app.scenario")
+
+#: Inputs of the relative state in hill component order with their grid labels and default grid bounds
+grid_components = {
+    "r-pos-input": ("Radial Position (km)", -10, 10),
+    "i-pos-input": ("In-Track Position (km)", -50, 50),
+    "c-pos-input": ("Cross-Track Position (km)", -10, 10),
+    "r-vel-input": ("Radial Velocity (m/s)", -1, 1),
+    "i-vel-input": ("In-Track Velocity (m/s)", -1, 1),
+    "c-vel-input": ("Cross-Track Velocity (m/s)", -1, 1),
+}
+
+#: Values shown by the grid panels in subplot order
+grid_quantities = {
+    "min_range": "Minimum Range (km)",
+    "max_range": "Maximum Excursion (km)",
+    "drift": "In-Track Drift (km/day)",
+}
+
+#: Largest number of samples along each grid axis
+max_grid_samples = 150
 
 register_page(__name__, title="OTK - Relative", name="relmo")
 
 figure = {
     "data": [
         {"type": "scatter3d", "mode": "lines", "line": {"color": "darkcyan"}, "name": "Chase"},
-        {"type": "scatter3d", "mode": "markers", "marker": {"color": "darkmagenta"}, "name": "Target"},
+        {
+            "x": [0],
+            "y": [0],
+            "z": [0],
+            "type": "scatter3d",
+            "mode": "markers",
+            "marker": {"color": "darkmagenta"},
+            "name": "Target",
+        },
+        {"type": "scatter3d", "mode": "markers", "marker": {"color": "darkcyan"}, "name": "Chase Position"},
     ],
-    "layout": go.Layout(
+    "layout": dict(
+        autosize=True,
         uirevision="constant",
-        template="plotly_dark",
+        template=DARK_TEMPLATE,
         scene={
             "xaxis": {"range": [-300, 300], "title": "radial"},
             "yaxis": {"range": [-300, 300], "title": "in-track"},
@@ -27,6 +71,52 @@ figure = {
     ),
 }
 
+grid_figure = {
+    "data": [
+        {
+            "type": "heatmap",
+            "xaxis": "x%s" % (k + 1 if k else ""),
+            "yaxis": "y%s" % (k + 1 if k else ""),
+            "name": label,
+            "colorbar": {"title": label, "len": 0.9 / len(grid_quantities), "y": 1 - (k + 0.5) / len(grid_quantities)},
+        }
+        for k, label in enumerate(grid_quantities.values())
+    ],
+    "layout": dict(
+        autosize=True,
+        uirevision="constant",
+        template=DARK_TEMPLATE,
+        grid={"rows": len(grid_quantities), "columns": 1, "pattern": "independent"},
+    ),
+}
+
+grid_bounds = [
+    dbc.InputGroup(
+        [
+            dbc.InputGroupText(label, class_name="input-text-label"),
+            dbc.Input(
+                id="%s-min" % key,
+                type="number",
+                value=low,
+                persistence=True,
+                debounce=INPUT_DEBOUNCE,
+                class_name="input-text",
+            ),
+            dbc.Input(
+                id="%s-max" % key,
+                type="number",
+                value=high,
+                persistence=True,
+                debounce=INPUT_DEBOUNCE,
+                class_name="input-text",
+            ),
+        ]
+    )
+    for key, (label, low, high) in grid_components.items()
+]
+
+grid_axis_options = [{"label": label, "value": key} for key, (label, _, _) in grid_components.items()]
+
 content_column = dbc.Col(
     [
         html.Div(
@@ -40,12 +130,54 @@ content_column = dbc.Col(
         ),
         dbc.InputGroup(
             [
-                dbc.Input(id="r-pos-input", type="number", value=-5, persistence=True, style={"width": "16.666%"}),
-                dbc.Input(id="i-pos-input", type="number", value=0, persistence=True, style={"width": "16.666%"}),
-                dbc.Input(id="c-pos-input", type="number", value=0, persistence=True, style={"width": "16.666%"}),
-                dbc.Input(id="r-vel-input", type="number", value=0, persistence=True, style={"width": "16.666%"}),
-                dbc.Input(id="i-vel-input", type="number", value=0, persistence=True, style={"width": "16.666%"}),
-                dbc.Input(id="c-vel-input", type="number", value=1, persistence=True, style={"width": "16.666%"}),
+                dbc.Input(
+                    id="r-pos-input",
+                    type="number",
+                    value=-5,
+                    persistence=True,
+                    debounce=INPUT_DEBOUNCE,
+                    style={"width": "16.666%"},
+                ),
+                dbc.Input(
+                    id="i-pos-input",
+                    type="number",
+                    value=0,
+                    persistence=True,
+                    debounce=INPUT_DEBOUNCE,
+                    style={"width": "16.666%"},
+                ),
+                dbc.Input(
+                    id="c-pos-input",
+                    type="number",
+                    value=0,
+                    persistence=True,
+                    debounce=INPUT_DEBOUNCE,
+                    style={"width": "16.666%"},
+                ),
+                dbc.Input(
+                    id="r-vel-input",
+                    type="number",
+                    value=0,
+                    persistence=True,
+                    debounce=INPUT_DEBOUNCE,
+                    style={"width": "16.666%"},
+                ),
+                dbc.Input(
+                    id="i-vel-input",
+                    type="number",
+                    value=0,
+                    persistence=True,
+                    debounce=INPUT_DEBOUNCE,
+                    style={"width": "16.666%"},
+                ),
+                dbc.Input(
+                    id="c-vel-input",
+                    type="number",
+                    value=1,
+                    persistence=True,
+                    debounce=INPUT_DEBOUNCE,
+                    style={"width": "16.666%"},
+                ),
             ]
         ),
         dbc.Row(
@@ -58,7 +190,52 @@ content_column = dbc.Col(
                 dbc.Col(dcc.Markdown(r"$\dot z (\frac{km}{s})$", mathjax=True)),
             ]
         ),
-        dcc.Graph(id="rel-plot", responsive=True, figure=figure, style={"width": "100%", "height": "80%"}),
+        lite_view(
+            dcc.Graph(id="rel-plot", responsive=True, figure=figure, style={"width": "100%", "height": "80%"}),
+            HILL_PANELS,
+            HILL_LABELS,
+            columns=2,
+        ),
+        time_controls("rel", "rel-plot"),
+        html.Div(
+            [
+                html.H2("Approach Planning Grid"),
+                dbc.FormText(
+                    "Vary two components of the relative state between the bounds below while the others keep the \
+                    values entered above.  Each cell summarizes one day of motion from that state.  Click a cell to \
+                    load its state into the view above."
+                ),
+            ]
+        ),
+        *grid_bounds,
+        dbc.InputGroup(
+            [
+                dbc.InputGroupText("Samples", class_name="input-text-label"),
+                dbc.Input(
+                    id="rel-grid-samples",
+                    type="number",
+                    value=60,
+                    min=2,
+                    max=max_grid_samples,
+                    persistence=True,
+                    debounce=INPUT_DEBOUNCE,
+                    class_name="input-text",
+                ),
+            ]
+        ),
+        dbc.InputGroup(
+            [
+                dbc.InputGroupText("Horizontal Axis", class_name="input-text-label"),
+                dbc.Select(id="rel-grid-x", options=grid_axis_options, value="i-pos-input", persistence=True),
+            ]
+        ),
+        dbc.InputGroup(
+            [
+                dbc.InputGroupText("Vertical Axis", class_name="input-text-label"),
+                dbc.Select(id="rel-grid-y", options=grid_axis_options, value="r-pos-input", persistence=True),
+            ]
+        ),
+        dcc.Graph(id="rel-grid-plot", responsive=True, figure=grid_figure, style={"width": "100%", "height": "120vh"}),
     ],
     className="content-container",
 )
@@ -72,6 +249,8 @@ layout = dbc.Container(
 
 @callback(
     Output("rel-plot", "figure"),
+    Output("rel-frames", "data"),
+    Output("rel-time", "max"),
     [
         Input("r-pos-input", "value"),
         Input("i-pos-input", "value"),
@@ -80,90 +259,98 @@ layout = dbc.Container(
         Input("i-vel-input", "value"),
         Input("c-vel-input", "value"),
     ],
-    [
-        State("sma", "data"),
-        State("rel-plot", "figure"),
-    ],
+    State("scenario", "data"),
 )
-def update_plot(r, i, c, vr, vi, vc, sma, figure):
+def update_plot(r, i, c, vr, vi, vc, stored):
+    if None in (r, i, c, vr, vi, vc):
+        return no_update, no_update, no_update
+    sma = scenario.current(stored)["sma"]
     m_to_km = 1 / BASE_IN_KILO
-    input_hcw: HCW = HCW.from_state_vector(Vector6D(r, i, c, vr * m_to_km, vi * m_to_km, vc * m_to_km))
-    prop = Hill(input_hcw, sma)
-    total_time = 0
-    dt = prop.step_size
-    r, i, c = [], [], []
-    prop.step_by_seconds(-SECONDS_IN_DAY * 0.5)
-
-    while total_time < SECONDS_IN_DAY:
-        prop.step()
-        r.append(prop.state.position.x)
-        i.append(prop.state.position.y)
-        c.append(prop.state.position.z)
-        total_time += dt
-
-    figure = {
-        "data": [
-            {
-                "x": r,
-                "y": i,
-                "z": c,
-                "type": "scatter3d",
-                "mode": "lines",
-                "line": {"color": "darkcyan"},
-                "name": "Chase",
-            },
-            {
-                "x": [0],
-                "y": [0],
-                "z": [0],
-                "type": "scatter3d",
-                "mode": "markers",
-                "marker": {"color": "darkmagenta"},
-                "name": "Target",
-            },
-        ],
-        "layout": go.Layout(
-            autosize=True,
-            uirevision="constant",
-            template="plotly_dark",
-            scene={
-                "xaxis": {"range": [-300, 300], "title": "radial"},
-                "yaxis": {"range": [-300, 300], "title": "in-track"},
-                "zaxis": {"range": [-300, 300], "title": "cross-track"},
-            },
-        ),
-    }
+    times = relative.display_times()
+    state = [r, i, c, vr * m_to_km, vi * m_to_km, vc * m_to_km]
+    # the closed form trajectory is cheaper to compute than to read from the archive, only the grid is archived
+    states = relative.trajectory(state, sma, times)
+    figure = Patch()
+    encoding.assign_trace(figure, 0, decimation.decimate(states[:, :3]))
+    frames = {"hours": (times / 3600).tolist(), "markers": {2: states[:, :3].T.tolist()}}
 
-    return figure
+    return figure, frames, len(times) - 1
 
 
 @callback(
-    [
-        Output("r-pos", "data"),
-        Output("i-pos", "data"),
-        Output("c-pos", "data"),
-    ],
+    Output("scenario", "data", allow_duplicate=True),
     [
         Input("r-pos-input", "value"),
         Input("i-pos-input", "value"),
         Input("c-pos-input", "value"),
+        Input("r-vel-input", "value"),
+        Input("i-vel-input", "value"),
+        Input("c-vel-input", "value"),
     ],
+    State("scenario", "data"),
+    prevent_initial_call="initial_duplicate",
 )
-def update_position(r, i, c):
-    return r, i, c
+def update_offset(r, i, c, vr, vi, vc, stored):
+    if None in (r, i, c, vr, vi, vc):
+        return no_update
+    return scenario.update(stored, offset=(r, i, c, vr / BASE_IN_KILO, vi / BASE_IN_KILO, vc / BASE_IN_KILO))
 
 
 @callback(
-    [
-        Output("r-vel", "data"),
-        Output("i-vel", "data"),
-        Output("c-vel", "data"),
-    ],
-    [
-        Input("r-vel-input", "value"),
-        Input("i-vel-input", "value"),
-        Input("c-vel-input", "value"),
-    ],
+    Output("rel-grid-plot", "figure"),
+    inputs={
+        "bounds": [Input("%s-%s" % (key, bound), "value") for key in grid_components for bound in ("min", "max")],
+        "samples": Input("rel-grid-samples", "value"),
+        "x_key": Input("rel-grid-x", "value"),
+        "y_key": Input("rel-grid-y", "value"),
+        "design": [Input(key, "value") for key in grid_components],
+    },
+    state={"stored": State("scenario", "data")},
 )
-def update_velocity(r, i, c):
-    return r / BASE_IN_KILO, i / BASE_IN_KILO, c / BASE_IN_KILO
+def update_grid_plot(bounds, samples, x_key, y_key, design, stored):
+    bounds = list(zip(bounds[::2], bounds[1::2]))
+    if x_key == y_key or samples is None or None in design or None in sum(bounds, ()):
+        raise PreventUpdate
+
+    # the grid does not depend on the plotted components so loading a clicked cell leaves it unchanged
+    if ctx.triggered_id in (x_key, y_key):
+        raise PreventUpdate
+
+    keys = list(grid_components)
+    x, y = keys.index(x_key), keys.index(y_key)
+    m_to_km = 1 / BASE_IN_KILO
+    scale = [1, 1, 1, m_to_km, m_to_km, m_to_km]
+    state = [value * factor for value, factor in zip(design, scale)]
+    axis_bounds = [(low * scale[k], high * scale[k]) for k, (low, high) in ((x, bounds[x]), (y, bounds[y]))]
+    samples = min(max(int(samples), 2), max_grid_samples)
+    values = (state, axis_bounds, x, y, samples, scenario.current(stored)["sma"], relative.planning_times())
+    xs, ys, grid = archive.store.fetch(
+        "hill-grid", values, lambda: jobs.executor.run("cw.update_grid_plot", relative.plane, *values)
+    )
+
+    figure = Patch()
+    for n, quantity in enumerate(grid_quantities):
+        figure["data"][n]["x"] = encoding.encode(xs / scale[x])
+        figure["data"][n]["y"] = encoding.encode(ys / scale[y])
+        figure["data"][n]["z"] = encoding.encode(grid[quantity])
+        axis = n + 1 if n else ""
+        figure["layout"]["xaxis%s" % axis]["title"] = grid_components[x_key][0]
+        figure["layout"]["yaxis%s" % axis]["title"] = grid_components[y_key][0]
+
+    return figure
+
+
+@callback(
+    [Output(key, "value") for key in grid_components],
+    Input("rel-grid-plot", "clickData"),
+    State("rel-grid-x", "value"),
+    State("rel-grid-y", "value"),
+    prevent_initial_call=True,
+)
+def load_grid_state(click, x_key, y_key):
+    if not click:
+        raise PreventUpdate
+
+    point = click["points"][0]
+    selected = {x_key: round(point["x"], 6), y_key: round(point["y"], 6)}
+    return [selected.get(key, no_update) for key in grid_components]
@@ -1,11 +1,16 @@
 from math import atan, cos, pi, sin
 
 import dash_bootstrap_components as dbc
-import plotly.graph_objects as go
-from dash import callback, ctx, dcc, get_asset_url, html, register_page
-from dash.dependencies import Input, Output, State
+from dash import Patch, ctx, dcc, get_asset_url, html, register_page
+from dash.dependencies import Input, Output
+from dash.exceptions import PreventUpdate
 
-from openspace_app.widgets import nav_column
+from openspace_app.lazy import lazy_import
+from openspace_app.metrics import callback
+from openspace_app.widgets import DARK_TEMPLATE, INPUT_DEBOUNCE, nav_column
+
+encoding = lazy_import("openspace_app.encoding")
+optics = lazy_import("openspace_app.optics")
 
 deg2rad = pi / 180
 rad2deg = 180 / pi
@@ -13,6 +18,25 @@ moon_size = 0.52
 circle_range = range(0, 361)
 unit_x, unit_y = [cos(d * deg2rad) for d in circle_range], [sin(d * deg2rad) for d in circle_range]
 
+#: Telescope and sensor dimensions in the order they are swept with their default sweep bounds in mm
+sweep_parameters = {
+    "img-diameter": ("Image Circle Diameter (mm)", 20, 60),
+    "focal-length": ("Focal Length (mm)", 100, 1000),
+    "sensor-x": ("Sensor Width (mm)", 5, 36),
+    "sensor-y": ("Sensor Height (mm)", 4, 24),
+}
+
+#: Quantities shown in the trade space panels in subplot order
+sweep_quantities = {
+    "fov": "Field of View (deg)",
+    "fov_x": "Horizontal Field of View (deg)",
+    "fov_y": "Vertical Field of View (deg)",
+    "moon": "Moon Diameter (mm)",
+}
+
+#: Largest number of samples along each trade space axis
+max_sweep_samples = 100
+
 register_page(__name__, title="OTK - Hardware", name="hardware")
 
 figure = dict(
@@ -21,10 +45,10 @@ figure = dict(
         dict(x=[], y=[], type="scatter", mode="lines", line=dict(color="darkmagenta"), name="Sensor Frame"),
         dict(x=[], y=[], type="scatter", mode="lines", line=dict(color="grey"), showlegend=False),
     ],
-    layout=go.Layout(
+    layout=dict(
         autosize=True,
         uirevision="constant",
-        template="plotly_dark",
+        template=DARK_TEMPLATE,
         yaxis=dict(scaleanchor="x", scaleratio=1, showticklabels=False, showgrid=False, zeroline=False),
         xaxis=dict(showticklabels=False, showgrid=False, zeroline=False),
         annotations=[{}, {}, {}],
@@ -32,6 +56,64 @@ figure = dict(
     ),
 )
 
+sweep_figure = dict(
+    data=[
+        dict(
+            type="contour",
+            xaxis="x%s" % (k or ""),
+            yaxis="y%s" % (k or ""),
+            contours=dict(coloring="heatmap", showlabels=True),
+            showscale=False,
+            name=label,
+        )
+        for k, label in zip([0, 2, 3, 4], sweep_quantities.values())
+    ],
+    layout=dict(
+        autosize=True,
+        uirevision="constant",
+        template=DARK_TEMPLATE,
+        grid=dict(rows=2, columns=2, pattern="independent"),
+        annotations=[
+            dict(
+                text=label,
+                xref="x%s domain" % (k or ""),
+                yref="y%s domain" % (k or ""),
+                x=0.5,
+                y=1.1,
+                showarrow=False,
+            )
+            for k, label in zip([0, 2, 3, 4], sweep_quantities.values())
+        ],
+    ),
+)
+
+sweep_bounds = [
+    dbc.InputGroup(
+        [
+            dbc.InputGroupText(label, class_name="input-text-label"),
+            dbc.Input(
+                id="%s-min" % key,
+                type="number",
+                value=low,
+                persistence=True,
+                debounce=INPUT_DEBOUNCE,
+                class_name="input-text",
+            ),
+            dbc.Input(
+                id="%s-max" % key,
+                type="number",
+                value=high,
+                persistence=True,
+                debounce=INPUT_DEBOUNCE,
+                class_name="input-text",
+            ),
+        ]
+    )
+    for key, (label, low, high) in sweep_parameters.items()
+]
+
+sweep_axis_options = [dict(label=label, value=key) for key, (label, _, _) in sweep_parameters.items()]
+
 content_column = dbc.Col(
     [
         dbc.Label("Telescope"),
@@ -61,6 +143,39 @@ content_column = dbc.Col(
             ]
         ),
         dcc.Graph(id="sensor-plot", responsive=True, figure=figure, style={"width": "100%", "height": "70%"}),
+        dbc.Label("Trade Space"),
+        dbc.FormText(
+            "Sweep two of the dimensions between the bounds below while the others keep the values entered above."
+        ),
+        *sweep_bounds,
+        dbc.InputGroup(
+            [
+                dbc.InputGroupText("Samples", class_name="input-text-label"),
+                dbc.Input(
+                    id="sweep-samples",
+                    type="number",
+                    value=60,
+                    min=2,
+                    max=max_sweep_samples,
+                    persistence=True,
+                    debounce=INPUT_DEBOUNCE,
+                    class_name="input-text",
+                ),
+            ]
+        ),
+        dbc.InputGroup(
+            [
+                dbc.InputGroupText("Horizontal Axis", class_name="input-text-label"),
+                dbc.Select(id="sweep-x", options=sweep_axis_options, value="focal-length", persistence=True),
+            ]
+        ),
+        dbc.InputGroup(
+            [
+                dbc.InputGroupText("Vertical Axis", class_name="input-text-label"),
+                dbc.Select(id="sweep-y", options=sweep_axis_options, value="img-diameter", persistence=True),
+            ]
+        ),
+        dcc.Graph(id="sweep-plot", responsive=True, figure=sweep_figure, style={"width": "100%", "height": "90vh"}),
     ],
     className="content-container",
 )
@@ -84,10 +199,10 @@ layout = dbc.Container(
         Input("sensor-y", "value"),
         Input("focal-length", "value"),
     ],
-    State("sensor-plot", "figure"),
 )
-def update_sensor_plot(d: float, w: float, h: float, flen: float, figure):
+def update_sensor_plot(d: float, w: float, h: float, flen: float):
 
+    figure = Patch()
     if ctx.triggered_id == "img-diameter":
         r = d * 0.5
         fov = atan(d / flen) * rad2deg
@@ -142,7 +257,7 @@ def update_sensor_plot(d: float, w: float, h: float, flen: float, figure):
             y=moon * 0.5,
             layer="below",
         )
-    elif len(figure["data"][0]["x"]) == 0:
+    else:
         r = d * 0.5
         fov = atan(d / flen) * rad2deg
         fovx = w / d * fov
@@ -167,3 +282,41 @@ def update_sensor_plot(d: float, w: float, h: float, flen: float, figure):
         )
 
     return figure
+
+
+@callback(
+    Output("sweep-plot", "figure"),
+    [Input("%s-%s" % (key, bound), "value") for key in sweep_parameters for bound in ("min", "max")]
+    + [
+        Input("sweep-samples", "value"),
+        Input("sweep-x", "value"),
+        Input("sweep-y", "value"),
+        Input("img-diameter", "value"),
+        Input("focal-length", "value"),
+        Input("sensor-x", "value"),
+        Input("sensor-y", "value"),
+    ],
+)
+def update_sweep_plot(
+    d_min, d_max, flen_min, flen_max, w_min, w_max, h_min, h_max, samples, x_key, y_key, d, flen, w, h
+):
+
+    bounds = [(d_min, d_max), (flen_min, flen_max), (w_min, w_max), (h_min, h_max)]
+    design = [d, flen, w, h]
+    if x_key == y_key or samples is None or None in design or None in sum(bounds, ()):
+        raise PreventUpdate
+
+    keys = list(sweep_parameters)
+    samples = min(max(int(samples), 2), max_sweep_samples)
+    x, y, grid = optics.plane(bounds, design, keys.index(x_key), keys.index(y_key), samples)
+
+    figure = Patch()
+    for n, quantity in enumerate(sweep_quantities):
+        figure["data"][n]["x"] = encoding.encode(x)
+        figure["data"][n]["y"] = encoding.encode(y)
+        figure["data"][n]["z"] = encoding.encode(grid[quantity])
+        axis = n + 1 if n else ""
+        figure["layout"]["xaxis%s" % axis]["title"] = sweep_parameters[x_key][0]
+        figure["layout"]["yaxis%s" % axis]["title"] = sweep_parameters[y_key][0]
+
+    return figure
@@ -1,12 +1,16 @@
+from typing import Optional
+
 import dash_bootstrap_components as dbc
-from dash import Input, Output, State, callback, dcc, html, register_page
-from openspace.bodies.celestial import Earth
+from dash import Input, Output, State, dcc, html, no_update, register_page
 from openspace.coordinates.states import GCRF, HCW, StateConvert
-from openspace.math.functions import EquationsOfMotion
 from openspace.math.linalg import Vector3D, Vector6D
 from openspace.time import Epoch
 
-from openspace_app.widgets import nav_column
+from openspace_app.lazy import lazy_import
+from openspace_app.metrics import callback
+from openspace_app.widgets import INPUT_DEBOUNCE, nav_column
+
+scenario = lazy_import("openspace_app.scenario")
 
 register_page(
     __name__,
@@ -24,6 +28,7 @@ config_accordion = dbc.Accordion(
                 dbc.Input(
                     id="target-epoch-input",
                     persistence=True,
+                    debounce=True,
                     type="text",
                     className="epoch-input",
                     value="2023-01-30 12:00:00",
@@ -46,26 +51,48 @@ config_accordion = dbc.Accordion(
                             type="number",
                             value=42164,
                             persistence=True,
+                            debounce=INPUT_DEBOUNCE,
                             className="vector6d-field",
                         ),
                         dbc.Input(
-                            id="target-input-y", type="number", value=0, persistence=True, className="vector6d-field"
+                            id="target-input-y",
+                            type="number",
+                            value=0,
+                            persistence=True,
+                            debounce=INPUT_DEBOUNCE,
+                            className="vector6d-field",
                         ),
                         dbc.Input(
-                            id="target-input-z", type="number", value=0, persistence=True, className="vector6d-field"
+                            id="target-input-z",
+                            type="number",
+                            value=0,
+                            persistence=True,
+                            debounce=INPUT_DEBOUNCE,
+                            className="vector6d-field",
                         ),
                         dbc.Input(
-                            id="target-input-vx", type="number", value=0, persistence=True, className="vector6d-field"
+                            id="target-input-vx",
+                            type="number",
+                            value=0,
+                            persistence=True,
+                            debounce=INPUT_DEBOUNCE,
+                            className="vector6d-field",
                         ),
                         dbc.Input(
                             id="target-input-vy",
                             type="number",
                             value=3.074,
                             persistence=True,
+                            debounce=INPUT_DEBOUNCE,
                             className="vector6d-field",
                         ),
                         dbc.Input(
-                            id="target-input-vz", type="number", value=0, persistence=True, className="vector6d-field"
+                            id="target-input-vz",
+                            type="number",
+                            value=0,
+                            persistence=True,
+                            debounce=INPUT_DEBOUNCE,
+                            className="vector6d-field",
                         ),
                     ]
                 ),
@@ -124,19 +151,16 @@ content_column = dbc.Col(
 layout = dbc.Container([html.Br(), dbc.Row([nav_column, content_column])])
 
 
-@callback(
-    [
-        Output("target-epoch", "data"),
-        Output("target-epoch-input", "invalid"),
-    ],
-    Input("target-epoch-input", "value"),
-    State("target-epoch", "data"),
-)
-def update_target_epoch(ep_str: str, tgt_ep: Epoch):
+def parse_epoch(ep_str: str) -> Optional[float]:
+    """convert the epoch input text to a modified julian date
 
-    ep = tgt_ep
+    :param ep_str: epoch formatted as YYYY-MM-DD hh:mm:ss
+    :type ep_str: str
+    :return: the epoch value or None when the text is not a valid epoch
+    :rtype: Optional[float]
+    """
     invalid = False
-    date_time = ep_str.split(" ")
+    date_time = (ep_str or "").split(" ")
     if len(date_time) < 2:
         invalid = True
     else:
@@ -169,10 +193,18 @@ def update_target_epoch(ep_str: str, tgt_ep: Epoch):
             elif month == 2 and day > 29:
                 invalid = True
 
-    if not invalid:
-        ep = Epoch.from_gregorian(year, month, day, hrs, mins, secs).value
+    if invalid:
+        return None
+
+    return Epoch.from_gregorian(year, month, day, hrs, mins, secs).value
+
 
-    return ep, invalid
+@callback(
+    Output("target-epoch-input", "invalid"),
+    Input("target-epoch-input", "value"),
+)
+def update_target_epoch(ep_str: str):
+    return parse_epoch(ep_str) is None
 
 
 @callback(
@@ -183,16 +215,10 @@ def update_target_epoch(ep_str: str, tgt_ep: Epoch):
         Output("chase-text-vx", "children"),
         Output("chase-text-vy", "children"),
         Output("chase-text-vz", "children"),
-        Output("sma", "data"),
-        Output("target-x", "data"),
-        Output("target-y", "data"),
-        Output("target-z", "data"),
-        Output("target-vx", "data"),
-        Output("target-vy", "data"),
-        Output("target-vz", "data"),
+        Output("scenario", "data", allow_duplicate=True),
     ],
     [
-        Input("target-epoch", "data"),
+        Input("target-epoch-input", "value"),
         Input("target-input-x", "value"),
         Input("target-input-y", "value"),
         Input("target-input-z", "value"),
@@ -200,26 +226,25 @@ def update_target_epoch(ep_str: str, tgt_ep: Epoch):
         Input("target-input-vy", "value"),
         Input("target-input-vz", "value"),
     ],
-    [
-        State("r-pos", "data"),
-        State("i-pos", "data"),
-        State("c-pos", "data"),
-        State("r-vel", "data"),
-        State("i-vel", "data"),
-        State("c-vel", "data"),
-    ],
+    State("scenario", "data"),
+    prevent_initial_call="initial_duplicate",
 )
-def update_chase(tgt_ep, x, y, z, vx, vy, vz, r, i, c, vr, vi, vc):
+def update_chase(ep_str, x, y, z, vx, vy, vz, stored):
+
+    if None in (x, y, z, vx, vy, vz):
+        return (no_update,) * 7
+
+    new = scenario.update(stored, epoch=parse_epoch(ep_str), target=(x, y, z, vx, vy, vz))
+    current = scenario.current(stored if new is no_update else new)
+    r, i, c, vr, vi, vc = current["offset"]
 
-    ep: Epoch = Epoch(tgt_ep)
-    tgt: GCRF = GCRF(ep, Vector3D(x, y, z), Vector3D(vx, vy, vz))
+    tgt: GCRF = GCRF(Epoch(current["epoch"]), Vector3D(x, y, z), Vector3D(vx, vy, vz))
     hill: HCW = HCW.from_state_vector(Vector6D(r, i, c, vr, vi, vc))
     chase: GCRF = StateConvert.hcw.to_gcrf(hill, tgt)
-    sma: float = EquationsOfMotion.A.from_mu_r_v(Earth.MU, tgt.position.magnitude(), tgt.velocity.magnitude())
     cx = "%.6f" % chase.position.x
     cy = "%.6f" % chase.position.y
     cz = "%.6f" % chase.position.z
     cvx = "%.6f" % chase.velocity.x
     cvy = "%.6f" % chase.velocity.y
     cvz = "%.6f" % chase.velocity.z
-    return cx, cy, cz, cvx, cvy, cvz, sma, x, y, z, vx, vy, vz
+    return cx, cy, cz, cvx, cvy, cvz, new
@@ -1,26 +1,86 @@
+from base64 import b64decode
+
 import dash_bootstrap_components as dbc
-import plotly.graph_objects as go
-from dash import callback, dcc, html, register_page
+from dash import Patch, dcc, html, no_update, register_page
 from dash.dependencies import Input, Output, State
-from openspace.bodies.artificial import Spacecraft
-from openspace.coordinates.states import GCRF, HCW, StateConvert
-from openspace.math.linalg import Vector3D, Vector6D
-from openspace.time import Epoch
+from dash.exceptions import PreventUpdate
+
+from openspace_app import jobs, supersede
+from openspace_app.lazy import lazy_import
+from openspace_app.metrics import callback
+from openspace_app.widgets import DARK_TEMPLATE, INERTIAL_LABELS, INERTIAL_PANELS, lite_view, nav_column, time_controls
+
+approach = lazy_import("openspace_app.approach")
+catalog = lazy_import("openspace_app.catalog")
+decimation = lazy_import("openspace_app.decimation")
+encoding = lazy_import("openspace_app.encoding")
+ephemeris = lazy_import("openspace_app.ephemeris")
+scenario = lazy_import("openspace_app.scenario")
 
-from openspace_app.widgets import nav_column
+#: Number of traces the objects of an uploaded catalog are combined into
+catalog_groups = 8
+
+#: Index of the first catalog trace in the inertial figure
+first_catalog_trace = 5
+
+#: Columns of the downloaded ephemeris
+download_columns = ["epoch_mjd"] + [
+    "%s_%s" % (vehicle, component)
+    for vehicle in ("target", "chase")
+    for component in ("x_km", "y_km", "z_km", "vx_km_s", "vy_km_s", "vz_km_s")
+]
 
 register_page(__name__, title="OTK - Inertial", name="inertial")
 
 figure = {
     "data": [
-        {"type": "scatter3d", "mode": "markers", "marker": {"color": "blue"}, "name": "Earth"},
+        {
+            "x": [0],
+            "y": [0],
+            "z": [0],
+            "type": "scatter3d",
+            "mode": "markers",
+            "marker": {"color": "blue"},
+            "name": "Earth",
+        },
         {"type": "scatter3d", "mode": "lines", "line": {"color": "darkmagenta"}, "name": "Target"},
         {"type": "scatter3d", "mode": "lines", "line": {"color": "darkcyan"}, "name": "Chase"},
+        {"type": "scatter3d", "mode": "markers", "marker": {"color": "darkmagenta"}, "name": "Target Position"},
+        {"type": "scatter3d", "mode": "markers", "marker": {"color": "darkcyan"}, "name": "Chase Position"},
+    ]
+    + [
+        {
+            "type": "scatter3d",
+            "mode": "lines",
+            "line": {"color": "lightgray", "width": 1},
+            "name": "Catalog Group %d" % (k + 1),
+            "visible": False,
+        }
+        for k in range(catalog_groups)
+    ],
+    "layout": dict(
+        autosize=True,
+        uirevision="constant",
+        template=DARK_TEMPLATE,
+    ),
+}
+
+range_figure = {
+    "data": [
+        {"type": "scatter", "mode": "lines", "line": {"color": "darkcyan"}, "name": "Range"},
+        {
+            "type": "scatter",
+            "mode": "markers",
+            "marker": {"color": "firebrick", "size": 10},
+            "name": "Closest Approach",
+        },
     ],
-    "layout": go.Layout(
+    "layout": dict(
         autosize=True,
         uirevision="constant",
-        template="plotly_dark",
+        template=DARK_TEMPLATE,
+        xaxis={"title": "Hours From Target Epoch"},
+        yaxis={"title": "Range (km)"},
     ),
 }
 
@@ -40,9 +100,36 @@ layout = dbc.Container(
                                 ),
                             ]
                         ),
+                        dcc.Upload(
+                            dbc.Button("Load Catalog", outline=True, color="light"),
+                            id="catalog-upload",
+                        ),
+                        dbc.FormText(
+                            "Load a file of two-line element sets or comma separated rows of name, epoch (MJD), \
+                            position (km) and velocity (km/s) to draw the neighbours of the target.",
+                            id="catalog-status",
+                        ),
+                        dcc.Store(id="catalog-epoch"),
+                        lite_view(
+                            dcc.Graph(
+                                id="eci-plot", responsive=True, figure=figure, style={"width": "100%", "height": "80%"}
+                            ),
+                            INERTIAL_PANELS,
+                            INERTIAL_LABELS,
+                        ),
+                        time_controls("eci", "eci-plot"),
                         dcc.Graph(
-                            id="eci-plot", responsive=True, figure=figure, style={"width": "100%", "height": "80%"}
+                            id="range-plot",
+                            responsive=True,
+                            figure=range_figure,
+                            style={"width": "100%", "height": "40vh"},
+                        ),
+                        dbc.Button("Download CSV", id="eci-download-button", outline=True, color="light"),
+                        dbc.FormText(
+                            "The download holds the GCRF states of the target and chase at every display step, \
+                            interpolated from the propagated nodes, the plots are decimated."
                         ),
+                        dcc.Download(id="eci-download"),
                     ],
                     className="content-container",
                 ),
@@ -55,77 +142,112 @@ layout = dbc.Container(
 
 @callback(
     Output("eci-plot", "figure"),
-    [
-        Input("target-x", "data"),
-        Input("target-y", "data"),
-        Input("target-z", "data"),
-        Input("target-vx", "data"),
-        Input("target-vy", "data"),
-        Input("target-vz", "data"),
-        Input("target-epoch", "data"),
-        Input("r-pos", "data"),
-        Input("i-pos", "data"),
-        Input("c-pos", "data"),
-        Input("r-vel", "data"),
-        Input("i-vel", "data"),
-        Input("c-vel", "data"),
-    ],
-    State("eci-plot", "figure"),
+    Output("range-plot", "figure"),
+    Output("eci-frames", "data"),
+    Output("eci-time", "max"),
+    Input("scenario", "data"),
+    State(supersede.TAB, "data"),
 )
-def update_plot(x, y, z, vx, vy, vz, tgt_ep, r, i, c, vr, vi, vc, figure):
-    ep = Epoch(tgt_ep)
-    tgt = Spacecraft(GCRF(ep, Vector3D(x, y, z), Vector3D(vx, vy, vz)))
-    chase = Spacecraft(
-        StateConvert.hcw.to_gcrf(HCW.from_state_vector(Vector6D(r, i, c, vr, vi, vc)), tgt.current_state())
+def update_plot(stored, tab):
+    x, y, z, vx, vy, vz, tgt_ep, r, i, c, vr, vi, vc = scenario.values(stored)
+    checkpoint = supersede.latest("inertial.update_plot", tab)
+    span = ephemeris.FUTURE_SPAN
+    values = (x, y, z, vx, vy, vz, tgt_ep, r, i, c, vr, vi, vc, span)
+    tgt_path, chase_path = jobs.executor.run(
+        "inertial.update_plot",
+        ephemeris.scenario_paths,
+        *values,
+        checkpoint=checkpoint,
+        key=ephemeris.scenario_key(*values),
     )
-    end_ep = ep.plus_days(1)
-
-    tx, ty, tz, cx, cy, cz = [], [], [], [], [], []
-    while tgt.current_epoch().value < end_ep.value:
-        tgt.step()
-        chase.step()
-        tx.append(tgt.position().x)
-        ty.append(tgt.position().y)
-        tz.append(tgt.position().z)
-        cx.append(chase.position().x)
-        cy.append(chase.position().y)
-        cz.append(chase.position().z)
-
-    figure = {
-        "data": [
-            {
-                "x": [0],
-                "y": [0],
-                "z": [0],
-                "type": "scatter3d",
-                "mode": "markers",
-                "marker": {"color": "blue"},
-                "name": "Earth",
-            },
-            {
-                "x": tx,
-                "y": ty,
-                "z": tz,
-                "type": "scatter3d",
-                "mode": "lines",
-                "line": {"color": "darkmagenta"},
-                "name": "Target",
-            },
-            {
-                "x": cx,
-                "y": cy,
-                "z": cz,
-                "type": "scatter3d",
-                "mode": "lines",
-                "line": {"color": "darkcyan"},
-                "name": "Chase",
-            },
-        ],
-        "layout": go.Layout(
-            autosize=True,
-            uirevision="constant",
-            template="plotly_dark",
-        ),
+
+    epochs = ephemeris.display_epochs(tgt_ep, span)
+    (tgt_positions, _), (chase_positions, _) = tgt_path.sample(epochs), chase_path.sample(epochs)
+
+    figure = Patch()
+    encoding.assign_trace(figure, 1, decimation.decimate(tgt_positions))
+    encoding.assign_trace(figure, 2, decimation.decimate(chase_positions))
+    figure["layout"]["title"] = "Interpolated Within %.3f km Of The Dense Propagation" % max(
+        tgt_path.error, chase_path.error
+    )
+
+    history, minima = approach.range_profile(tgt_path, chase_path, epochs)
+    hours, closest = minima[minima[:, 1].argmin()]
+
+    range_plot = Patch()
+    encoding.assign_trace(range_plot, 0, decimation.decimate(history))
+    encoding.assign_trace(range_plot, 1, minima)
+    range_plot["layout"]["title"] = "Closest Approach: %.3f km at %.3f hours" % (closest, hours)
+
+    frames = {
+        "hours": history[:, 0].tolist(),
+        "markers": {3: tgt_positions.T.tolist(), 4: chase_positions.T.tolist()},
     }
 
-    return figure
+    return figure, range_plot, frames, len(epochs) - 1
+
+
+@callback(
+    Output("eci-download", "data"),
+    Input("eci-download-button", "n_clicks"),
+    State("scenario", "data"),
+    prevent_initial_call=True,
+)
+def download_ephemeris(_, stored):
+    # the same job as update_plot so a download while the plot is computed waits for it instead of repeating it
+    values = (*scenario.values(stored), ephemeris.FUTURE_SPAN)
+    tgt_path, chase_path = jobs.executor.run(
+        "inertial.download_ephemeris", ephemeris.scenario_paths, *values, key=ephemeris.scenario_key(*values)
+    )
+    epochs = ephemeris.display_epochs(values[6], ephemeris.FUTURE_SPAN)
+    text = encoding.table(download_columns, epochs, *tgt_path.sample(epochs), *chase_path.sample(epochs))
+    return dcc.send_string(text, "inertial-ephemeris.csv")
+
+
+@callback(
+    Output("catalog-epoch", "data"),
+    Input("scenario", "data"),
+    State("catalog-epoch", "data"),
+)
+def update_catalog_epoch(stored, previous):
+    # catalog tracks only depend on the target epoch so other scenario edits do not propagate them again
+    epoch = scenario.current(stored)["epoch"]
+    return no_update if epoch == previous else epoch
+
+
+@callback(
+    Output("eci-plot", "figure", allow_duplicate=True),
+    Output("catalog-status", "children"),
+    Input("catalog-upload", "contents"),
+    Input("catalog-epoch", "data"),
+    State("catalog-upload", "filename"),
+    State(supersede.TAB, "data"),
+    prevent_initial_call=True,
+    running=[(Output("eci-plot", "className"), "running", "")],
+)
+def update_catalog(contents, epoch, filename, tab):
+    if contents is None or epoch is None:
+        raise PreventUpdate
+    checkpoint = supersede.latest("inertial.update_catalog", tab)
+
+    try:
+        entries = catalog.parse(b64decode(contents.split(",", 1)[1]).decode())
+    except (ValueError, UnicodeDecodeError) as error:
+        return no_update, "%s could not be read: %s" % (filename, error)
+
+    # stale element sets would be stepped for hours to reach the target epoch so they are left out
+    usable = catalog.nearby(entries, epoch)
+    paths = catalog.tracks(usable, epoch, ephemeris.FUTURE_SPAN, "inertial.update_catalog", checkpoint)
+
+    figure = Patch()
+    for k, points in enumerate(catalog.combine(paths, catalog_groups)):
+        encoding.assign_trace(figure, first_catalog_trace + k, points)
+        figure["data"][first_catalog_trace + k]["visible"] = len(points) > 0
+
+    status = "%d objects loaded from %s" % (len(usable), filename)
+    if len(usable) < len(entries):
+        status += ", %d skipped with epochs more than %g days from the target" % (
+            len(entries) - len(usable),
+            catalog.EPOCH_WINDOW,
+        )
+    return figure, status
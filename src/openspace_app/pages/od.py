@@ -1,28 +1,119 @@
 import dash_bootstrap_components as dbc
-import plotly.graph_objects as go
-from dash import callback, dcc, html, register_page
+from dash import Patch, dcc, html, register_page
 from dash.dependencies import Input, Output, State
-from openspace.bodies.artificial import Spacecraft
-from openspace.coordinates.states import GCRF, HCW, StateConvert
-from openspace.math.linalg import Vector3D, Vector6D
-from openspace.time import Epoch
+from dash.exceptions import PreventUpdate
+
+from openspace_app import jobs, supersede
+from openspace_app.lazy import lazy_import
+from openspace_app.metrics import callback
+from openspace_app.widgets import DARK_TEMPLATE, HILL_LABELS, HILL_PANELS, lite_view, nav_column
+
+#: Hill axes of the Monte Carlo error panels in subplot order
+study_axes = ("Radial", "In-Track", "Cross-Track")
+
+#: Largest number of runs accepted for one Monte Carlo study
+max_study_runs = 2000
+
+#: Columns of the downloaded filter history
+download_columns = ["hours"] + [
+    "%s_%s_km" % (kind, axis) for kind in ("truth", "observed") for axis in ("radial", "in_track", "cross_track")
+]
+
+#: Milliseconds between requests for the progress of the filter while it runs
+progress_interval = 250
+
+decimation = lazy_import("openspace_app.decimation")
+encoding = lazy_import("openspace_app.encoding")
+estimation = lazy_import("openspace_app.estimation")
+scenario = lazy_import("openspace_app.scenario")
+
+
+def history_patch(truth: list, observed: list) -> Patch:
+    """replace the truth and observed traces of the filter plot with their decimated histories
+
+    :param truth: true relative positions in km of shape (n, 3)
+    :type truth: list
+    :param observed: estimated relative positions in km of shape (n, 3)
+    :type observed: list
+    :return: partial update of the filter plot
+    :rtype: Patch
+    """
+    figure = Patch()
+    encoding.assign_trace(figure, 1, decimation.decimate(truth))
+    encoding.assign_trace(figure, 2, decimation.decimate(observed))
+    return figure
 
-from openspace_app.widgets import nav_column
 
 register_page(__name__, title="OTK - Estimation", name="estimation")
 
 figure = {
     "data": [
-        {"type": "scatter3d", "mode": "markers", "marker": {"color": "darkmagenta"}, "name": "Target"},
+        {
+            "x": [0],
+            "y": [0],
+            "z": [0],
+            "type": "scatter3d",
+            "mode": "markers",
+            "marker": {"color": "darkmagenta"},
+            "name": "Target",
+        },
         {"type": "scatter3d", "mode": "lines", "line": {"color": "darkcyan"}, "name": "Truth"},
         {"type": "scatter3d", "mode": "lines", "line": {"color": "firebrick"}, "name": "Observed"},
     ],
-    "layout": go.Layout(
+    "layout": dict(
         autosize=True,
         uirevision="constant",
-        template="plotly_dark",
+        template=DARK_TEMPLATE,
     ),
 }
+study_figure = {
+    "data": [
+        trace
+        for k, axis in enumerate(study_axes)
+        for trace in (
+            {
+                "type": "scatter",
+                "mode": "lines",
+                "line": {"width": 0},
+                "xaxis": "x%s" % (k + 1 if k else ""),
+                "yaxis": "y%s" % (k + 1 if k else ""),
+                "showlegend": False,
+                "hoverinfo": "skip",
+            },
+            {
+                "type": "scatter",
+                "mode": "lines",
+                "line": {"width": 0},
+                "fill": "tonexty",
+                "fillcolor": "rgba(0, 139, 139, 0.3)",
+                "xaxis": "x%s" % (k + 1 if k else ""),
+                "yaxis": "y%s" % (k + 1 if k else ""),
+                "name": "3-Sigma",
+                "legendgroup": "sigma",
+                "showlegend": not k,
+            },
+            {
+                "type": "scatter",
+                "mode": "lines",
+                "line": {"color": "firebrick"},
+                "xaxis": "x%s" % (k + 1 if k else ""),
+                "yaxis": "y%s" % (k + 1 if k else ""),
+                "name": "Mean",
+                "legendgroup": "mean",
+                "showlegend": not k,
+            },
+        )
+    ],
+    "layout": dict(
+        autosize=True,
+        uirevision="constant",
+        template=DARK_TEMPLATE,
+        grid={"rows": len(study_axes), "columns": 1, "pattern": "independent"},
+        **{"yaxis%s" % (k + 1 if k else ""): {"title": "%s Error (km)" % axis} for k, axis in enumerate(study_axes)},
+        **{"xaxis%s" % len(study_axes): {"title": "Hours From Target Epoch"}},
+    ),
+}
+
 layout = dbc.Container(
     [
         html.Br(),
@@ -42,8 +133,50 @@ layout = dbc.Container(
                                 ),
                             ]
                         ),
+                        lite_view(
+                            dcc.Graph(
+                                id="od-plot", responsive=True, style={"width": "100%", "height": "80%"}, figure=figure
+                            ),
+                            HILL_PANELS,
+                            HILL_LABELS,
+                            columns=2,
+                        ),
+                        dbc.Button("Download CSV", id="od-download-button", outline=True, color="light"),
+                        dbc.FormText(
+                            "The download holds the true and observed hill positions of every filter step, the plot is \
+                            decimated."
+                        ),
+                        dcc.Download(id="od-download"),
+                        html.Div(
+                            [
+                                html.H2("Monte Carlo Study"),
+                                dbc.FormText(
+                                    "Repeat the scenario with randomly perturbed filter seeds and relative states. \
+                                    The plot shows the mean estimation error and its 3-sigma envelope along each \
+                                    hill axis across every run."
+                                ),
+                            ]
+                        ),
+                        dbc.InputGroup(
+                            [
+                                dbc.InputGroupText("Runs", class_name="input-text-label"),
+                                dbc.Input(
+                                    id="od-study-runs",
+                                    type="number",
+                                    value=100,
+                                    min=2,
+                                    max=max_study_runs,
+                                    persistence=True,
+                                    class_name="input-text",
+                                ),
+                                dbc.Button("Run", id="od-study-run"),
+                            ]
+                        ),
                         dcc.Graph(
-                            id="od-plot", responsive=True, style={"width": "100%", "height": "80%"}, figure=figure
+                            id="od-study-plot",
+                            responsive=True,
+                            style={"width": "100%", "height": "90vh"},
+                            figure=study_figure,
                         ),
                     ],
                     className="content-container",
@@ -57,85 +190,75 @@ layout = dbc.Container(
 
 @callback(
     Output("od-plot", "figure"),
-    [
-        Input("target-x", "data"),
-        Input("target-y", "data"),
-        Input("target-z", "data"),
-        Input("target-vx", "data"),
-        Input("target-vy", "data"),
-        Input("target-vz", "data"),
-        Input("target-epoch", "data"),
-        Input("r-pos", "data"),
-        Input("i-pos", "data"),
-        Input("c-pos", "data"),
-        Input("r-vel", "data"),
-        Input("i-vel", "data"),
-        Input("c-vel", "data"),
+    Input("scenario", "data"),
+    background=True,
+    cancel=Input("scenario", "data"),
+    running=[(Output("od-plot", "className"), "running", "")],
+    progress=Output("od-plot", "figure", allow_duplicate=True),
+    interval=progress_interval,
+)
+def update_plot(set_progress, stored):
+    truth, observed = estimation.filter_history(
+        *scenario.values(stored), progress=lambda truth, observed: set_progress(history_patch(truth, observed))
+    )
+    return history_patch(truth, observed)
+
+
+@callback(
+    Output("od-download", "data"),
+    Input("od-download-button", "n_clicks"),
+    State("scenario", "data"),
+    prevent_initial_call=True,
+)
+def download_history(_, stored):
+    # read from the archive once update_plot solved the scenario, solved on the job workers otherwise
+    rows = jobs.executor.run("od.download_history", estimation.history_rows, *scenario.values(stored))
+    return dcc.send_string(encoding.table(download_columns, rows), "estimation-history.csv")
+
+
+@callback(
+    Output("od-study-plot", "figure"),
+    Input("od-study-run", "n_clicks"),
+    State("od-study-runs", "value"),
+    State("scenario", "data"),
+    State(supersede.TAB, "data"),
+    prevent_initial_call=True,
+    running=[
+        (Output("od-study-plot", "className"), "running", ""),
+        (Output("od-study-run", "disabled"), True, False),
     ],
-    State("od-plot", "figure"),
 )
-def update_plot(x, y, z, vx, vy, vz, tgt_ep, r, i, c, vr, vi, vc, figure):
-    ep = Epoch(tgt_ep)
-    tgt = Spacecraft(GCRF(ep, Vector3D(x, y, z), Vector3D(vx, vy, vz)))
-    chase = Spacecraft(
-        StateConvert.hcw.to_gcrf(HCW.from_state_vector(Vector6D(r, i, c, vr, vi, vc)), tgt.current_state())
+def update_study_plot(_, runs, stored, tab):
+    if runs is None:
+        raise PreventUpdate
+    checkpoint = supersede.latest("od.update_study_plot", tab)
+
+    runs = min(max(int(runs), 2), max_study_runs)
+    hours, mean, sigma = estimation.monte_carlo(
+        *scenario.values(stored), runs=runs, name="od.update_study_plot", checkpoint=checkpoint
     )
-    tgt.step_to_epoch(ep.plus_days(-0.5))
-    chase.step_to_epoch(ep.plus_days(-0.5))
-    end_ep = ep.plus_days(0.5)
-
-    seed = Spacecraft(GCRF(ep, Vector3D(x + 0.5, y + 0.5, z + 0.5), Vector3D(vx, vy, vz)))
-    seed.step_to_epoch(ep.plus_days(-0.5))
-    chase.acquire(seed)
-    tx, ty, tz, cx, cy, cz = [], [], [], [], [], []
-    while tgt.current_epoch().value < end_ep.value:
-        tgt.step()
-        chase.step()
-        chase.process_wfov(tgt)
-
-        rel_truth = tgt.hill_position(chase)
-        tx.append(-chase.filter.propagator.state.position.x)
-        ty.append(-chase.filter.propagator.state.position.y)
-        tz.append(-chase.filter.propagator.state.position.z)
-        cx.append(rel_truth.x)
-        cy.append(rel_truth.y)
-        cz.append(rel_truth.z)
-
-    figure = {
-        "data": [
-            {
-                "x": [0],
-                "y": [0],
-                "z": [0],
-                "type": "scatter3d",
-                "mode": "markers",
-                "marker": {"color": "darkmagenta"},
-                "name": "Target",
-            },
-            {
-                "x": cx,
-                "y": cy,
-                "z": cz,
-                "type": "scatter3d",
-                "mode": "lines",
-                "line": {"color": "darkcyan"},
-                "name": "Truth",
-            },
-            {
-                "x": tx,
-                "y": ty,
-                "z": tz,
-                "type": "scatter3d",
-                "mode": "lines",
-                "line": {"color": "firebrick"},
-                "name": "Observed",
-            },
-        ],
-        "layout": go.Layout(
-            autosize=True,
-            uirevision="constant",
-            template="plotly_dark",
-        ),
-    }
+    checkpoint()
+
+    figure = Patch()
+    for k in range(len(study_axes)):
+        for trace, values in enumerate((mean[:, k] + 3 * sigma[:, k], mean[:, k] - 3 * sigma[:, k], mean[:, k])):
+            figure["data"][3 * k + trace]["x"] = encoding.encode(hours)
+            figure["data"][3 * k + trace]["y"] = encoding.encode(values)
+
+    return figure
+
 
+@callback(
+    Output("od-study-plot", "figure", allow_duplicate=True),
+    Input("scenario", "data"),
+    State(supersede.TAB, "data"),
+    prevent_initial_call=True,
+)
+def clear_study_plot(_, tab):
+    # a study of the previous scenario is stale, a study still running stops before its next job
+    supersede.latest("od.update_study_plot", tab)
+    figure = Patch()
+    for trace in range(3 * len(study_axes)):
+        figure["data"][trace]["x"] = []
+        figure["data"][trace]["y"] = []
     return figure
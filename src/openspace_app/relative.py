@@ -0,0 +1,194 @@
+from math import sqrt
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+from openspace.bodies.celestial import Earth
+from openspace.coordinates.states import HCW
+from openspace.math.constants import SECONDS_IN_DAY
+from openspace.math.linalg import Vector6D
+from openspace.propagators.relative import Hill
+
+#: Number of initial states propagated together by summarize
+BATCH_SIZE: int = 256
+
+#: Seconds between samples used to search candidate trajectories for their closest approach
+PLANNING_STEP: float = 60
+
+
+def display_times(span: float = SECONDS_IN_DAY, step: float = Hill.DEFAULT_STEP_SIZE) -> np.ndarray:
+    """create the time grid used by the relative motion views
+
+    :param span: number of seconds centered on the initial state
+    :type span: float
+    :param step: number of seconds between samples
+    :type step: float
+    :return: seconds from the initial state of every displayed sample
+    :rtype: np.ndarray
+    """
+    return np.arange(1, round(span / step) + 1) * step - span * 0.5
+
+
+def planning_times(span: float = SECONDS_IN_DAY, step: float = PLANNING_STEP) -> np.ndarray:
+    """create the time grid used to summarize candidate approach trajectories
+
+    :param span: number of seconds after the initial state
+    :type span: float
+    :param step: number of seconds between samples
+    :type step: float
+    :return: seconds from the initial state of every sample including the initial state
+    :rtype: np.ndarray
+    """
+    return np.arange(round(span / step) + 1) * step
+
+
+def system_matrices(sma: float, times: np.ndarray) -> np.ndarray:
+    """evaluate the Clohessy-Wiltshire state transition matrix at every argument time
+
+    :param sma: semi-major axis of the origin vehicle in km
+    :type sma: float
+    :param times: seconds from the initial state
+    :type times: np.ndarray
+    :return: array of shape (len(times), 6, 6) matching Hill.system_matrix at each time
+    :rtype: np.ndarray
+    """
+    n = sqrt(Earth.MU / (sma * sma * sma))
+    n_inv = 1 / n
+    t = np.asarray(times, dtype=float)
+    nt = n * t
+    sn = np.sin(nt)
+    cs = np.cos(nt)
+
+    phi = np.zeros((t.size, 6, 6))
+    phi[:, 0, 0] = 4 - 3 * cs
+    phi[:, 0, 3] = sn * n_inv
+    phi[:, 0, 4] = 2 * (1 - cs) * n_inv
+    phi[:, 1, 0] = 6 * (sn - nt)
+    phi[:, 1, 1] = 1
+    phi[:, 1, 3] = -2 * (1 - cs) * n_inv
+    phi[:, 1, 4] = (4 * sn - 3 * nt) * n_inv
+    phi[:, 2, 2] = cs
+    phi[:, 2, 5] = sn * n_inv
+    phi[:, 3, 0] = 3 * n * sn
+    phi[:, 3, 3] = cs
+    phi[:, 3, 4] = 2 * sn
+    phi[:, 4, 0] = -6 * n * (1 - cs)
+    phi[:, 4, 3] = -2 * sn
+    phi[:, 4, 4] = 4 * cs - 3
+    phi[:, 5, 2] = -n * sn
+    phi[:, 5, 5] = cs
+
+    return phi
+
+
+def trajectory(state: np.ndarray, sma: float, times: np.ndarray, reference: bool = False) -> np.ndarray:
+    """solve the relative state at every argument time
+
+    :param state: initial hill state of shape (6,) or a batch of initial states of shape (m, 6)
+    :type state: np.ndarray
+    :param sma: semi-major axis of the origin vehicle in km
+    :type sma: float
+    :param times: seconds from the initial state
+    :type times: np.ndarray
+    :param reference: step the openspace Hill propagator instead of using the batched closed form
+    :type reference: bool
+    :return: states of shape (len(times), 6) or (m, len(times), 6) for a batch
+    :rtype: np.ndarray
+    """
+    state = np.asarray(state, dtype=float)
+    if reference:
+        if state.ndim > 1:
+            return np.stack([reference_trajectory(s, sma, times) for s in state])
+        return reference_trajectory(state, sma, times)
+
+    return np.einsum("nij,...j->...ni", system_matrices(sma, times), state)
+
+
+def reference_trajectory(state: np.ndarray, sma: float, times: np.ndarray) -> np.ndarray:
+    """solve the relative state at every argument time by stepping the openspace Hill propagator
+
+    :param state: initial hill state of shape (6,)
+    :type state: np.ndarray
+    :param sma: semi-major axis of the origin vehicle in km
+    :type sma: float
+    :param times: seconds from the initial state
+    :type times: np.ndarray
+    :return: states of shape (len(times), 6)
+    :rtype: np.ndarray
+    """
+    prop = Hill(HCW.from_state_vector(Vector6D(*(float(v) for v in state))), sma)
+    states = np.empty((len(times), 6))
+    elapsed = 0.0
+    for k, t in enumerate(times):
+        prop.step_by_seconds(float(t) - elapsed)
+        elapsed = float(t)
+        states[k, :3] = prop.state.position.x, prop.state.position.y, prop.state.position.z
+        states[k, 3:] = prop.state.velocity.x, prop.state.velocity.y, prop.state.velocity.z
+
+    return states
+
+
+def summarize(states: np.ndarray, sma: float, times: np.ndarray, batch_size: int = BATCH_SIZE) -> Dict[str, np.ndarray]:
+    """solve many initial states in batches and reduce each trajectory to the values used for approach planning
+
+    :param states: initial hill states of shape (m, 6)
+    :type states: np.ndarray
+    :param sma: semi-major axis of the origin vehicle in km
+    :type sma: float
+    :param times: seconds from the initial state
+    :type times: np.ndarray
+    :param batch_size: number of initial states solved together
+    :type batch_size: int
+    :return: minimum and maximum range in km and secular in-track drift in km per day of each initial state, keyed
+        by min_range, max_range and drift
+    :rtype: Dict[str, np.ndarray]
+    """
+    states = np.asarray(states, dtype=float).reshape(-1, 6)
+    phi = system_matrices(sma, times)[:, :3, :]
+    min_range, max_range = np.empty(len(states)), np.empty(len(states))
+    for start in range(0, len(states), batch_size):
+        end = start + batch_size
+        ranges = np.linalg.norm(np.matmul(phi, states[start:end].T), axis=1)
+        min_range[start:end] = ranges.min(axis=0)
+        max_range[start:end] = ranges.max(axis=0)
+
+    n = sqrt(Earth.MU / (sma * sma * sma))
+    drift = -(6 * n * states[:, 0] + 3 * states[:, 4]) * SECONDS_IN_DAY
+    return {"min_range": min_range, "max_range": max_range, "drift": drift}
+
+
+def plane(
+    state: np.ndarray,
+    bounds: Sequence[Tuple[float, float]],
+    x: int,
+    y: int,
+    samples: int,
+    sma: float,
+    times: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+    """summarize a grid of initial states that vary two components of a hill state between bounds
+
+    :param state: hill state of shape (6,) supplying the components that are not varied
+    :type state: np.ndarray
+    :param bounds: lower and upper bound of the horizontal then vertical component
+    :type bounds: Sequence[Tuple[float, float]]
+    :param x: index of the state component along the horizontal axis
+    :type x: int
+    :param y: index of the state component along the vertical axis
+    :type y: int
+    :param samples: number of samples along each axis
+    :type samples: int
+    :param sma: semi-major axis of the origin vehicle in km
+    :type sma: float
+    :param times: seconds from the initial state
+    :type times: np.ndarray
+    :return: samples of the horizontal and vertical components and arrays keyed like summarize of shape
+        (samples, samples) indexed by vertical then horizontal sample
+    :rtype: Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray]]
+    """
+    (x_low, x_high), (y_low, y_high) = bounds
+    xs, ys = np.linspace(x_low, x_high, samples), np.linspace(y_low, y_high, samples)
+    states = np.tile(np.asarray(state, dtype=float), (samples * samples, 1))
+    grid_x, grid_y = np.meshgrid(xs, ys)
+    states[:, x], states[:, y] = grid_x.ravel(), grid_y.ravel()
+    summary = summarize(states, sma, times)
+    return xs, ys, {key: values.reshape(samples, samples) for key, values in summary.items()}
@@ -0,0 +1,112 @@
+from typing import Optional, Sequence, Tuple
+
+from dash import no_update
+from openspace.bodies.celestial import Earth
+from openspace.math.functions import EquationsOfMotion
+from openspace.math.linalg import Vector3D
+from openspace.time import Epoch
+
+from openspace_app.ephemeris import scenario_key
+
+#: Layout version of the scenario kept in the browser session, stored scenarios of other versions are replaced
+VERSION: int = 1
+
+#: Default target epoch in modified julian days
+DEFAULT_EPOCH: float = Epoch.from_gregorian(2023, 1, 30, 12, 0, 0).value
+
+#: Default GCRF target state in km and km/s
+DEFAULT_TARGET: Tuple[float, ...] = (42164, 0, 0, 0, 3.074, 0)
+
+#: Default HCW chase offset in km and km/s
+DEFAULT_OFFSET: Tuple[float, ...] = (-5, 0, 0, 0, 0, 0.001)
+
+
+def create(epoch: float, target: Sequence[float], offset: Sequence[float]) -> dict:
+    """build the scenario shared by every page
+
+    :param epoch: target epoch in modified julian days
+    :type epoch: float
+    :param target: GCRF target state in km and km/s
+    :type target: Sequence[float]
+    :param offset: HCW chase state relative to the target in km and km/s
+    :type offset: Sequence[float]
+    :return: json compatible scenario including the semi-major axis of the target and a hash of the inputs
+    :rtype: dict
+    """
+    r, v = Vector3D(*target[:3]), Vector3D(*target[3:])
+    return {
+        "version": VERSION,
+        "hash": scenario_key(*target, epoch, *offset),
+        "epoch": epoch,
+        "target": list(target),
+        "offset": list(offset),
+        "sma": EquationsOfMotion.A.from_mu_r_v(Earth.MU, r.magnitude(), v.magnitude()),
+    }
+
+
+def default() -> dict:
+    """build the scenario used before any inputs are edited
+
+    :return: scenario of the default target and chase
+    :rtype: dict
+    """
+    return create(DEFAULT_EPOCH, DEFAULT_TARGET, DEFAULT_OFFSET)
+
+
+def current(scenario: Optional[dict]) -> dict:
+    """retrieve a usable scenario from the session store
+
+    :param scenario: data held by the scenario store
+    :type scenario: Optional[dict]
+    :return: the stored scenario or the default when it is missing or outdated
+    :rtype: dict
+    """
+    if not scenario or scenario.get("version") != VERSION:
+        return default()
+    return scenario
+
+
+def update(
+    scenario: Optional[dict],
+    epoch: Optional[float] = None,
+    target: Optional[Sequence[float]] = None,
+    offset: Optional[Sequence[float]] = None,
+):
+    """apply edits to the stored scenario
+
+    :param scenario: data held by the scenario store
+    :type scenario: Optional[dict]
+    :param epoch: new target epoch, None keeps the stored value
+    :type epoch: Optional[float]
+    :param target: new GCRF target state, None keeps the stored value
+    :type target: Optional[Sequence[float]]
+    :param offset: new HCW chase offset, None keeps the stored value
+    :type offset: Optional[Sequence[float]]
+    :return: the edited scenario or no_update when the edits are incomplete or do not change its hash
+    :rtype: Union[dict, NoUpdate]
+    """
+    for edit in (target, offset):
+        if edit is not None and any(v is None for v in edit):
+            return no_update
+
+    old = current(scenario)
+    new = create(
+        old["epoch"] if epoch is None else epoch,
+        old["target"] if target is None else target,
+        old["offset"] if offset is None else offset,
+    )
+    if scenario and new["hash"] == scenario.get("hash"):
+        return no_update
+    return new
+
+
+def values(scenario: Optional[dict]) -> Tuple[float, ...]:
+    """flatten a scenario into the target state, epoch and chase offset
+
+    :param scenario: data held by the scenario store
+    :type scenario: Optional[dict]
+    :return: x, y, z, vx, vy, vz, epoch, r, i, c, vr, vi, vc
+    :rtype: Tuple[float, ...]
+    """
+    scenario = current(scenario)
+    return (*scenario["target"], scenario["epoch"], *scenario["offset"])
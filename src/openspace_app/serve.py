@@ -0,0 +1,40 @@
+import flask
+
+from openspace_app.lazy import preload
+
+
+def serve(server: flask.Flask, host: str, port: int, workers: int, threads: int, timeout: int) -> None:
+    """run the application under gunicorn with the app loaded once before the workers are forked
+
+    :param server: flask server hosting the application
+    :type server: flask.Flask
+    :param host: interface to bind
+    :type host: str
+    :param port: port to bind
+    :type port: int
+    :param workers: number of worker processes
+    :type workers: int
+    :param threads: number of request threads in each worker
+    :type threads: int
+    :param timeout: seconds a worker may spend on one request before it is restarted
+    :type timeout: int
+    """
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError as error:
+        raise RuntimeError("serving with multiple workers requires gunicorn, install openspace-app[serve]") from error
+
+    class Application(BaseApplication):
+        def load_config(self) -> None:
+            self.cfg.set("bind", f"{host}:{port}")
+            self.cfg.set("workers", workers)
+            self.cfg.set("threads", threads)
+            self.cfg.set("worker_class", "gthread")
+            self.cfg.set("timeout", timeout)
+            self.cfg.set("preload_app", True)
+
+        def load(self) -> flask.Flask:
+            preload()
+            return server
+
+    Application().run()
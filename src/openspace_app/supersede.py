@@ -0,0 +1,68 @@
+import os
+import tempfile
+from threading import Lock
+from typing import Callable, Optional
+from uuid import uuid4
+
+import diskcache
+from dash import dcc
+from dash.exceptions import PreventUpdate
+
+#: Id of the store holding the id of a browser tab, read by callbacks with State(TAB, "data")
+TAB: str = "supersede-tab"
+
+#: Directory of the callback generations shared by every server process
+GENERATIONS_DIR: str = os.path.join(tempfile.gettempdir(), "openspace-app-generations")
+
+#: Seconds the generation of a callback in a tab is kept after its last run
+EXPIRE: float = 3600
+
+_cache: Optional[diskcache.Cache] = None
+_lock = Lock()
+
+
+def tab_store() -> dcc.Store:
+    """create the store identifying a browser tab, a new id is drawn every time the layout is served
+
+    :return: store kept in the memory of the tab so reloads and other tabs get their own id
+    :rtype: dcc.Store
+    """
+    return dcc.Store(id=TAB, storage_type="memory", data=uuid4().hex)
+
+
+def _generations() -> diskcache.Cache:
+    # opened on first use so every forked server process has its own connection
+    global _cache
+    with _lock:
+        if _cache is None:
+            _cache = diskcache.Cache(GENERATIONS_DIR)
+        return _cache
+
+
+def latest(name: str, tab: Optional[str]) -> Callable[[], None]:
+    """mark the current run as the newest run of a callback in a browser tab
+
+    generations are counted on disk so a run is superseded by a newer one served by any worker process, and a tab's
+    generation is evicted EXPIRE seconds after its last run
+
+    :param name: name of the callback being run
+    :type name: str
+    :param tab: data of the TAB store, runs without a tab, e.g. from scripts, are never superseded
+    :type tab: Optional[str]
+    :return: function that raises PreventUpdate once a newer run of the callback has started in the same tab
+    :rtype: Callable[[], None]
+    """
+    if not tab:
+        return lambda: None
+
+    cache = _generations()
+    key = "%s:%s" % (tab, name)
+    with cache.transact(retry=True):
+        generation = cache.incr(key)
+        cache.touch(key, expire=EXPIRE)
+
+    def abort_if_superseded() -> None:
+        if cache.get(key, retry=True) != generation:
+            raise PreventUpdate
+
+    return abort_if_superseded
@@ -1,4 +1,36 @@
+import json
+import pkgutil
+from math import ceil
+from typing import Dict, Sequence, Tuple
+
 import dash_bootstrap_components as dbc
+from dash import ClientsideFunction, clientside_callback, dcc, html
+from dash.dependencies import Input, Output, State
+
+#: plotly_dark template of every figure, read as json because building it through plotly.graph_objects costs about
+#: 30 ms at startup
+DARK_TEMPLATE: dict = json.loads(pkgutil.get_data("plotly", "package_data/templates/plotly_dark.json"))
+
+#: Milliseconds a numeric input waits after the last keystroke before its value is sent to the server
+INPUT_DEBOUNCE: int = 600
+
+#: Milliseconds between frames while a trajectory animation plays
+FRAME_INTERVAL: int = 50
+
+#: Id of the switch in the application layout that selects the lightweight 2-D views
+LITE_SWITCH: str = "lite-mode"
+
+#: Projections of hill frame trajectories keyed by title with their horizontal and vertical component
+HILL_PANELS: Dict[str, Tuple[int, int]] = {"R-I": (1, 0), "R-C": (2, 0), "I-C": (1, 2)}
+
+#: Axis titles of the radial, in-track and cross-track components
+HILL_LABELS: Tuple[str, str, str] = ("Radial (km)", "In-Track (km)", "Cross-Track (km)")
+
+#: Projections of inertial trajectories keyed by title with their horizontal and vertical component
+INERTIAL_PANELS: Dict[str, Tuple[int, int]] = {"X-Y": (0, 1), "X-Z": (0, 2)}
+
+#: Axis titles of the GCRF components
+INERTIAL_LABELS: Tuple[str, str, str] = ("X (km)", "Y (km)", "Z (km)")
 
 nav_column = dbc.Col(
     dbc.Nav(
@@ -16,3 +48,137 @@ nav_column = dbc.Col(
     ),
     width="auto",
 )
+
+
+def time_controls(prefix: str, graph: str) -> dbc.InputGroup:
+    """create a play button and time slider that move the markers of a graph through precomputed frames
+
+    the frames are written by the server to the store with id ``<prefix>-frames`` as a dictionary of hours from the
+    scenario epoch and marker positions keyed by trace index, every later update runs in the browser
+
+    :param prefix: prefix of the ids of the created components
+    :type prefix: str
+    :param graph: id of the graph holding the marker traces
+    :type graph: str
+    :return: the controls, the frame store and the interval driving playback
+    :rtype: dbc.InputGroup
+    """
+    clientside_callback(
+        ClientsideFunction(namespace="animation", function_name="place"),
+        Output(graph, "figure", allow_duplicate=True),
+        Output("%s-time-label" % prefix, "children"),
+        Input("%s-time" % prefix, "value"),
+        Input("%s-frames" % prefix, "data"),
+        prevent_initial_call=True,
+    )
+    clientside_callback(
+        ClientsideFunction(namespace="animation", function_name="toggle"),
+        Output("%s-interval" % prefix, "disabled"),
+        Output("%s-play" % prefix, "children"),
+        Input("%s-play" % prefix, "n_clicks"),
+        State("%s-interval" % prefix, "disabled"),
+        prevent_initial_call=True,
+    )
+    clientside_callback(
+        ClientsideFunction(namespace="animation", function_name="advance"),
+        Output("%s-time" % prefix, "value"),
+        Input("%s-interval" % prefix, "n_intervals"),
+        State("%s-time" % prefix, "value"),
+        State("%s-frames" % prefix, "data"),
+        prevent_initial_call=True,
+    )
+
+    return dbc.InputGroup(
+        [
+            dbc.Button("Play", id="%s-play" % prefix),
+            html.Div(
+                dcc.Slider(id="%s-time" % prefix, min=0, max=0, step=1, value=0, marks=None, updatemode="drag"),
+                style={"flex": "1", "paddingTop": "0.5em"},
+            ),
+            dbc.InputGroupText(id="%s-time-label" % prefix, class_name="input-text-label"),
+            dcc.Store(id="%s-frames" % prefix),
+            dcc.Interval(id="%s-interval" % prefix, interval=FRAME_INTERVAL, disabled=True),
+        ]
+    )
+
+
+def lite_view(
+    graph: dcc.Graph, panels: Dict[str, Tuple[int, int]], labels: Sequence[str], columns: int = 1
+) -> html.Div:
+    """pair a 3-D trajectory graph with linked 2-D projections shown instead of it while LITE_SWITCH is on
+
+    the projections are drawn in the browser from the traces of the 3-D figure so switching modes never calls the
+    server, and the 3-D traces become plain scatter traces while hidden so no WebGL scene is kept alive. panels that
+    share a horizontal or vertical component share that axis.
+
+    :param graph: graph of scatter3d traces that the server keeps updating
+    :type graph: dcc.Graph
+    :param panels: indices of the horizontal and vertical component of each projection keyed by its title
+    :type panels: Dict[str, Tuple[int, int]]
+    :param labels: axis title of each component
+    :type labels: Sequence[str]
+    :param columns: number of projections in each row
+    :type columns: int
+    :return: container holding both views
+    :rtype: html.Div
+    """
+    lite = "%s-lite" % graph.id
+    layout = {
+        "autosize": True,
+        "uirevision": "constant",
+        "template": DARK_TEMPLATE,
+        "grid": {"rows": ceil(len(panels) / columns), "columns": columns, "pattern": "independent"},
+        "meta": {"panels": list(panels.values())},
+        "annotations": [],
+    }
+    for k, (title, (h, v)) in enumerate(panels.items()):
+        suffix = k + 1 if k else ""
+        xaxis, yaxis = {"title": labels[h]}, {"title": labels[v]}
+        earlier = list(panels.values())[:k]
+        shared_x = [n for n, (other, _) in enumerate(earlier) if other == h]
+        shared_y = [n for n, (_, other) in enumerate(earlier) if other == v]
+        if shared_x:
+            xaxis["matches"] = "x%s" % (shared_x[0] + 1 if shared_x[0] else "")
+        if shared_y:
+            yaxis["matches"] = "y%s" % (shared_y[0] + 1 if shared_y[0] else "")
+        layout["xaxis%s" % suffix], layout["yaxis%s" % suffix] = xaxis, yaxis
+        layout["annotations"].append(
+            {
+                "text": title,
+                "xref": "x%s domain" % suffix,
+                "yref": "y%s domain" % suffix,
+                "x": 0.5,
+                "y": 1,
+                "yanchor": "bottom",
+                "showarrow": False,
+            }
+        )
+
+    clientside_callback(
+        ClientsideFunction(namespace="projection", function_name="show"),
+        Output("%s-full" % graph.id, "style"),
+        Output("%s-view" % lite, "style"),
+        Output(graph.id, "figure", allow_duplicate=True),
+        Input(LITE_SWITCH, "value"),
+        State(graph.id, "figure"),
+        prevent_initial_call="initial_duplicate",
+    )
+    clientside_callback(
+        ClientsideFunction(namespace="projection", function_name="project"),
+        Output(lite, "figure"),
+        Input(graph.id, "figure"),
+        Input(LITE_SWITCH, "value"),
+        State(lite, "figure"),
+    )
+
+    return html.Div(
+        [
+            html.Div(graph, id="%s-full" % graph.id, style={"display": "contents"}),
+            html.Div(
+                dcc.Graph(id=lite, responsive=True, figure={"data": [], "layout": layout}, style=graph.style),
+                id="%s-view" % lite,
+                style={"display": "none"},
+            ),
+        ],
+        style={"display": "contents"},
+    )
@@ -0,0 +1,35 @@
+import unittest
+
+import numpy as np
+from openspace.bodies.celestial import Earth
+
+from openspace_app import approach, relative
+
+#: Semi-major axis in km of the geosynchronous origin vehicle used by the dashboard defaults
+SMA = 42164.0
+
+#: Seconds between the samples of the brute force search
+FINE_STEP = 0.5
+
+
+class TestRangeMinima(unittest.TestCase):
+    def test_refined_minima_match_a_brute_force_search(self):
+        n = np.sqrt(Earth.MU / SMA**3)
+        for state in ([1, -2, 0.5, 1e-4, -2e-4, 3e-4], [1, 0, 2, 0, -2 * n + 2e-6, 0], [-5, 0, 0, 0, 0, 0]):
+            coarse = relative.planning_times(86400, 600)
+            sampled = relative.trajectory(np.array(state, dtype=float), SMA, coarse)
+            times, ranges = approach.range_minima(coarse, sampled[:, :3], sampled[:, 3:])
+
+            fine = relative.planning_times(86400, FINE_STEP)
+            distance = np.linalg.norm(relative.trajectory(np.array(state, dtype=float), SMA, fine)[:, :3], axis=1)
+            minima = np.flatnonzero((distance[1:-1] < distance[:-2]) & (distance[1:-1] <= distance[2:])) + 1
+
+            # the first and last samples are reported only where the range increases from or decreases to them
+            interior = (times > coarse[0]) & (times < coarse[-1])
+            self.assertEqual(interior.sum(), len(minima), state)
+            np.testing.assert_allclose(times[interior], fine[minima], rtol=0, atol=FINE_STEP)
+            np.testing.assert_allclose(ranges[interior], distance[minima], rtol=0, atol=1e-6)
+
+
+if __name__ == "__main__":
+    unittest.main()
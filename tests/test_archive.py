@@ -0,0 +1,86 @@
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from threading import Thread
+
+from openspace_app import archive
+
+#: Seconds a computation of the tests takes, long enough for every other lookup to find it running
+COMPUTE_TIME = 0.5
+
+
+def slow_pid() -> int:
+    time.sleep(COMPUTE_TIME)
+    return os.getpid()
+
+
+def fetch_pid(directory: str) -> int:
+    return archive.Archive(directory).fetch("pid", [1.0], slow_pid)
+
+
+class TestArchiveFlight(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = archive.Archive(self.directory.name)
+        self.flight = "%s.flight" % self.store.key("pid", [1.0])
+
+    def tearDown(self):
+        self.store.configure(self.directory.name, archive.SIZE_LIMIT)
+        self.directory.cleanup()
+
+    def test_processes_share_one_computation(self):
+        with multiprocessing.get_context("spawn").Pool(2) as pool:
+            pids = pool.map(fetch_pid, [self.directory.name] * 2)
+        # both processes return the pid of the one that computed the result
+        self.assertEqual(len(set(pids)), 1)
+        self.assertIsNone(self.store._open().get(self.flight))
+
+    def test_dead_owner_is_taken_over(self):
+        dead = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+        self.store._open().add(self.flight, (socket.gethostname(), int(dead.stdout)), expire=archive.FLIGHT_LEASE)
+
+        start = time.perf_counter()
+        self.assertEqual(self.store.fetch("pid", [1.0], os.getpid), os.getpid())
+        self.assertLess(time.perf_counter() - start, COMPUTE_TIME)
+        self.assertEqual(self.store.misses, 1)
+
+    def test_live_owner_of_another_host_is_waited_for_until_its_lease_expires(self):
+        self.store._open().add(self.flight, ("another-host", os.getpid()), expire=COMPUTE_TIME)
+
+        start = time.perf_counter()
+        self.assertEqual(self.store.fetch("pid", [1.0], os.getpid), os.getpid())
+        self.assertGreaterEqual(time.perf_counter() - start, COMPUTE_TIME)
+        self.assertEqual(self.store.misses, 1)
+
+    def test_waiting_thread_takes_over_a_failed_computation(self):
+        def fail():
+            time.sleep(COMPUTE_TIME)
+            raise RuntimeError("computation failed")
+
+        errors = []
+
+        def owner():
+            try:
+                self.store.fetch("pid", [1.0], fail)
+            except RuntimeError as error:
+                errors.append(error)
+
+        thread = Thread(target=owner)
+        thread.start()
+        time.sleep(COMPUTE_TIME / 5)
+        self.assertEqual(self.store.fetch("pid", [1.0], os.getpid), os.getpid())
+        thread.join()
+
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(self.store.misses, 2)
+        self.assertEqual(self.store.fetch("pid", [1.0], slow_pid), os.getpid())
+        self.assertEqual(self.store.hits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+from math import pi
+
+import numpy as np
+from openspace.bodies.celestial import Earth
+from openspace.math.constants import SECONDS_IN_DAY
+
+from openspace_app import catalog, ephemeris
+
+#: Element sets of the ISS with and without a name line and a state row of a geosynchronous object
+CATALOG = """# objects near the target
+ISS (ZARYA)
+1 25544U 98067A   08264.51782528 -.00002182  00000-0 -11606-4 0  2927
+2 25544  51.6416 247.4627 0006703 130.5360 325.0288 15.72125391563537
+1 25544U 98067A   08264.51782528 -.00002182  00000-0 -11606-4 0  2927
+2 25544  51.6416 247.4627 0006703 130.5360 325.0288 15.72125391563537
+
+GEO-1, 54730.0, 42164.0, 0.0, 0.0, 0.0, 3.0747, 0.0
+"""
+
+#: Epoch of the element sets, day 264.51782528 of 2008 in modified julian days
+TLE_EPOCH = 54466 + 263.51782528
+
+
+def geo_row(name: str, epoch: float, longitude: float) -> catalog.Entry:
+    x, y = 42164.0 * np.cos(longitude), 42164.0 * np.sin(longitude)
+    vx, vy = -3.0747 * np.sin(longitude), 3.0747 * np.cos(longitude)
+    return name, epoch, x, y, 0.0, vx, vy, 0.0
+
+
+class TestCatalog(unittest.TestCase):
+    def test_parse_element_sets_and_state_rows(self):
+        entries = catalog.parse(CATALOG)
+
+        self.assertEqual([entry[0] for entry in entries], ["ISS (ZARYA)", "25544", "GEO-1"])
+        self.assertEqual(entries[0][1:], entries[1][1:])
+        self.assertAlmostEqual(entries[0][1], TLE_EPOCH, places=8)
+
+        # the radius lies between perigee and apogee of the mean motion and eccentricity of the element set
+        n = 15.72125391 * 2 * pi / SECONDS_IN_DAY
+        sma = (Earth.MU / (n * n)) ** (1 / 3)
+        radius = np.linalg.norm(entries[0][2:5])
+        self.assertTrue(sma * (1 - 0.0006703) - 1e-6 <= radius <= sma * (1 + 0.0006703) + 1e-6)
+        self.assertAlmostEqual(np.linalg.norm(entries[0][5:]), np.sqrt(Earth.MU * (2 / radius - 1 / sma)), places=6)
+
+        self.assertEqual(entries[2], ("GEO-1", 54730.0, 42164.0, 0.0, 0.0, 0.0, 3.0747, 0.0))
+
+    def test_parse_rejects_unknown_lines(self):
+        with self.assertRaisesRegex(ValueError, "catalog line 2"):
+            catalog.parse("GEO-1, 54730.0, 42164.0, 0.0, 0.0, 0.0, 3.0747, 0.0\nnot an object\n")
+
+    def test_nearby_keeps_element_sets_spread_over_the_window(self):
+        entries = catalog.parse(CATALOG)
+        epoch = TLE_EPOCH + catalog.EPOCH_WINDOW - 0.6
+
+        self.assertEqual([entry[0] for entry in catalog.nearby(entries, epoch)], ["ISS (ZARYA)", "25544", "GEO-1"])
+        self.assertEqual([entry[0] for entry in catalog.nearby(entries, epoch + 0.7)], ["GEO-1"])
+
+    def test_tracks_start_at_the_target_epoch_in_catalog_order(self):
+        epoch = 54730.0
+        entries = [geo_row("GEO-%d" % k, epoch, k * pi / 8) for k in range(catalog.BATCH_SIZE + 1)]
+        entries.append(geo_row("EARLY", epoch - 1, 0.0))
+
+        paths = catalog.tracks(entries, epoch, ephemeris.FUTURE_SPAN)
+
+        self.assertEqual(len(paths), len(entries))
+        for entry, path in zip(entries[:-1], paths):
+            self.assertEqual(path.shape, (catalog.POINT_BUDGET, 3))
+            np.testing.assert_allclose(path[0], entry[2:5])
+        # an object a day behind is stepped around its orbit to the target epoch before its track starts
+        np.testing.assert_allclose(np.linalg.norm(paths[-1][0]), 42164.0, rtol=1e-3)
+        self.assertGreater(np.linalg.norm(paths[-1][0] - paths[0][0]), 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+
+import numpy as np
+
+from openspace_app import decimation
+
+
+class TestLargestTriangle(unittest.TestCase):
+    def test_endpoints_are_kept_within_the_budget(self):
+        points = np.column_stack([np.linspace(0, 10, 1000), np.sin(np.linspace(0, 10, 1000))])
+        for budget in (3, 10, decimation.POINT_BUDGET):
+            kept = decimation.largest_triangle(points, budget)
+            self.assertEqual(len(kept), budget)
+            self.assertEqual((kept[0], kept[-1]), (0, len(points) - 1))
+            self.assertTrue(np.all(np.diff(kept) > 0))
+
+    def test_short_traces_are_kept_whole(self):
+        points = np.random.default_rng(0).normal(size=(decimation.POINT_BUDGET, 3))
+        np.testing.assert_array_equal(decimation.largest_triangle(points), np.arange(decimation.POINT_BUDGET))
+        np.testing.assert_array_equal(decimation.largest_triangle(points, 2), np.arange(decimation.POINT_BUDGET))
+
+    def test_outlier_peak_survives(self):
+        for dimension in (2, 3):
+            points = np.zeros((5000, dimension))
+            points[:, 0] = np.arange(5000)
+            points[3210, 1] = 100.0
+            self.assertIn(3210, decimation.largest_triangle(points, 20))
+
+    def test_decimate_returns_the_kept_samples(self):
+        points = np.column_stack([np.arange(500.0), np.cos(np.arange(500.0)), np.zeros(500)])
+        reduced = decimation.decimate(points.tolist())
+        self.assertEqual(reduced.shape, (decimation.POINT_BUDGET, 3))
+        np.testing.assert_array_equal(reduced, points[decimation.largest_triangle(points)])
+
+
+if __name__ == "__main__":
+    unittest.main()
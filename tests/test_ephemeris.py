@@ -0,0 +1,58 @@
+import unittest
+from math import radians
+
+import numpy as np
+from openspace.coordinates.elements import ClassicalElements
+from openspace.coordinates.states import GCRF
+from openspace.time import Epoch
+
+from openspace_app import archive, ephemeris, scenario
+
+
+def leo_state() -> GCRF:
+    ep = Epoch(scenario.DEFAULT_EPOCH)
+    state = ClassicalElements(ep, 6778, 0.001, radians(51.6), 0.3, radians(270), 0.5).to_ijk()
+    return GCRF(ep, state.position, state.velocity)
+
+
+class TestEphemeris(unittest.TestCase):
+    def setUp(self):
+        self.enabled, archive.store.enabled = archive.store.enabled, False
+        ephemeris.store.clear()
+
+    def tearDown(self):
+        archive.store.enabled = self.enabled
+        ephemeris.store.clear()
+
+    def test_coarse_path_within_tolerance_of_dense_loop(self):
+        values = scenario.values(scenario.default())[:7]
+        tgt, _ = ephemeris.scenario_states(*scenario.values(scenario.default()))
+        for span in (ephemeris.FUTURE_SPAN, ephemeris.PAST_SPAN):
+            path = ephemeris.target_path(*values, span)
+            states = ephemeris.propagate(tgt, span)
+            dense = states + [tgt] if span < 0 else [tgt] + states
+
+            # the default geosynchronous target needs far fewer nodes than the dense loop
+            self.assertLess(len(path), len(dense) / 2)
+            self.assertTrue(np.all(np.diff(path.epochs) > 0))
+            self.assertLessEqual(path.error, ephemeris.PATH_TOLERANCE)
+
+            drawn, _ = path.sample(np.array([s.epoch.value for s in dense]))
+            errors = np.linalg.norm(drawn - ephemeris.positions(dense), axis=1)
+            self.assertLessEqual(errors.max(), ephemeris.PATH_TOLERANCE)
+            # the estimate is of the same order as the error it bounds
+            self.assertGreater(path.error, errors.max() / 10)
+
+    def test_fast_orbit_falls_back_to_dense_loop(self):
+        state = leo_state()
+        self.assertIsNone(ephemeris.coarse_propagate(state, ephemeris.FUTURE_SPAN))
+
+        values = (*ephemeris.positions([state])[0], *ephemeris.velocities([state])[0], state.epoch.value)
+        path = ephemeris.target_path(*values, ephemeris.FUTURE_SPAN)
+        dense = [state] + ephemeris.target_ephemeris(*values, ephemeris.FUTURE_SPAN)
+        np.testing.assert_array_equal(path.positions, ephemeris.positions(dense))
+        self.assertEqual(path.error, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
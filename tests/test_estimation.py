@@ -0,0 +1,40 @@
+import unittest
+
+import numpy as np
+
+from openspace_app import estimation
+
+#: Epoch in modified julian days of the synthetic studies
+EPOCH = 60000.0
+
+
+class TestMonteCarlo(unittest.TestCase):
+    def test_two_runs_statistics(self):
+        days = EPOCH + np.array([-0.5, 0.0, 0.5])
+        first = np.array([[1.0, -2.0, 0.5], [0.0, 0.0, 0.0], [3.0, 1.0, -1.0]])
+        second = np.array([[3.0, -2.0, -0.5], [2.0, 4.0, 0.0], [-1.0, 1.0, 1.0]])
+
+        # each run comes back from its own job as the workers would split a two run study
+        hours, mean, sigma = estimation.summarize(EPOCH, [(days, first[None]), (days, second[None])])
+
+        np.testing.assert_allclose(hours, [-12.0, 0.0, 12.0])
+        np.testing.assert_allclose(mean, [[2.0, -2.0, 0.0], [1.0, 2.0, 0.0], [1.0, 1.0, 0.0]])
+        # the sample deviation of two runs is their distance over the square root of two
+        np.testing.assert_allclose(sigma, np.abs(first - second) / np.sqrt(2))
+        np.testing.assert_allclose((mean + 3 * sigma)[1], [1 + 3 * np.sqrt(2), 2 + 6 * np.sqrt(2), 0.0])
+
+    def test_chunks_are_reproducible(self):
+        values = (42164.0, 0.0, 0.0, 0.0, 3.07, 0.0, EPOCH, -5.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+        runs = 2 * estimation.STUDY_CHUNK + 1
+        chunks = estimation.study_chunks(*values, runs=runs, seed=7)
+        again = estimation.study_chunks(*values, runs=runs, seed=7)
+
+        self.assertEqual([len(offsets) for _, offsets, _ in chunks], [estimation.STUDY_CHUNK] * 2 + [1])
+        for (target, offsets, errors), (_, expected_offsets, expected_errors) in zip(chunks, again):
+            self.assertEqual(target, values[:7])
+            np.testing.assert_array_equal(offsets, expected_offsets)
+            np.testing.assert_array_equal(errors, expected_errors)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,188 @@
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from concurrent.futures.process import BrokenProcessPool
+from threading import Thread
+from uuid import uuid4
+
+import diskcache
+import flask
+
+from openspace_app import jobs
+
+#: Seconds a job of the tests holds its worker, long enough for every other call to find it running
+HOLD = 0.5
+
+
+def square(value: int) -> int:
+    return value * value
+
+
+def held(value: int) -> int:
+    time.sleep(HOLD)
+    return value
+
+
+def token() -> str:
+    time.sleep(HOLD)
+    return uuid4().hex
+
+
+def fail(value: int) -> int:
+    if value == 3:
+        raise ValueError("item %d failed" % value)
+    return value
+
+
+def spin() -> None:
+    while True:
+        pass
+
+
+def stuck() -> None:
+    # a job the worker cannot stop, as a long call into compiled code would be
+    signal.pthread_sigmask(signal.SIG_BLOCK, [signal.SIGALRM])
+    time.sleep(10 * HOLD)
+
+
+def crash() -> None:
+    os._exit(1)
+
+
+class TestExecutor(unittest.TestCase):
+    def setUp(self):
+        # two workers and two queued jobs, so one callback may hold two slots
+        self.executor = jobs.Executor(workers=2, queue_limit=2, timeout=jobs.TIMEOUT, share=0.5)
+        # the deadline of a job starts when it is handed to the pool, so the workers are started before the short
+        # timeout of the tests applies
+        self.executor.map("warm", held, range(self.executor.workers))
+        self.executor.timeout = 2 * HOLD
+
+    def tearDown(self):
+        self.executor.configure(0, 0, 0)
+
+    def test_run_returns_the_result_of_the_worker(self):
+        self.assertEqual(self.executor.run("test", square, 7), 49)
+
+    def test_callback_is_refused_beyond_its_share(self):
+        running = [self.executor.submit("busy", held, k) for k in range(2)]
+        with self.assertRaises(jobs.Rejected):
+            self.executor.submit("busy", held, 2, wait=0)
+        # another callback still finds the slots the busy one may not hold
+        other = self.executor.submit("other", square, 3, wait=0)
+        self.assertEqual([future.result() for future in running + [other]], [0, 1, 9])
+        self.assertEqual(self.executor.rejected, 1)
+
+    def test_jobs_are_refused_when_every_slot_is_held(self):
+        running = [self.executor.submit("page-%d" % k, held, k) for k in range(self.executor.capacity)]
+        start = time.monotonic()
+        with self.assertRaises(jobs.Rejected) as refused:
+            self.executor.submit("late", square, 2, wait=HOLD / 5)
+        self.assertGreaterEqual(time.monotonic() - start, HOLD / 5)
+        self.assertGreaterEqual(refused.exception.retry_after, 1)
+
+        # a slot is released when its job finishes
+        self.assertEqual([future.result() for future in running], list(range(self.executor.capacity)))
+        self.assertEqual(self.executor.submit("late", square, 2, wait=0).result(), 4)
+
+    def test_map_keeps_the_order_of_the_items_within_the_share(self):
+        self.assertEqual(self.executor.map("study", square, range(9)), [k * k for k in range(9)])
+        self.assertEqual(self.executor.rejected, 0)
+        self.assertEqual(sum(self.executor._held.values()), 0)
+
+    def test_map_raises_the_first_failure(self):
+        with self.assertRaisesRegex(ValueError, "item 3 failed"):
+            self.executor.map("study", fail, range(9))
+
+    def test_identical_runs_share_one_job(self):
+        results = []
+        threads = [Thread(target=lambda: results.append(self.executor.run("plot", token, key="k"))) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), 3)
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(self.executor.shared, 2)
+        # a run after the job landed computes again
+        self.assertNotEqual(self.executor.run("plot", token, key="k"), results[0])
+
+    def test_worker_stops_a_job_at_the_timeout(self):
+        with self.assertRaises(TimeoutError):
+            self.executor.run("spin", spin)
+        self.assertEqual(self.executor.run("test", square, 2), 4)
+
+    @unittest.skipUnless(hasattr(signal, "pthread_sigmask"), "signals cannot be blocked on this platform")
+    def test_server_gives_up_on_a_job_its_worker_cannot_stop(self):
+        start = time.monotonic()
+        with self.assertRaises(TimeoutError):
+            self.executor.run("stuck", stuck)
+        self.assertLess(time.monotonic() - start, 2 * HOLD + jobs.TIMEOUT_GRACE + 1)
+
+    def test_broken_pool_is_replaced(self):
+        with self.assertRaises(BrokenProcessPool):
+            self.executor.run("crash", crash)
+        self.assertEqual(self.executor.run("test", square, 5), 25)
+
+
+class TestBoundedDiskcacheManager(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = diskcache.Cache(self.directory.name)
+        self.executor = jobs.Executor(workers=1, queue_limit=0, timeout=HOLD)
+        self.manager = jobs.BoundedDiskcacheManager(self.cache, self.executor)
+
+    def tearDown(self):
+        self.cache.close()
+        self.directory.cleanup()
+
+    def test_background_job_is_refused_when_every_slot_is_held(self):
+        self.executor.acquire("other")
+        with self.assertRaises(jobs.Rejected):
+            self.manager.call_job_fn("key", None, (), {"outputs_list": {"id": "study-plot", "property": "figure"}})
+        self.assertEqual(self.executor._held["study-plot.figure"], 0)
+        self.assertEqual(self.executor.rejected, 1)
+
+    def test_background_job_is_killed_at_the_timeout_and_frees_its_slot(self):
+        process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+        self.executor.acquire("study-plot.figure")
+        self.manager._watch("study-plot.figure", process.pid)
+
+        self.assertIsNotNone(process.wait(HOLD))
+        self.assertEqual(sum(self.executor._held.values()), 0)
+
+
+class TestRegister(unittest.TestCase):
+    def setUp(self):
+        server = flask.Flask(__name__)
+        jobs.register(server)
+
+        @server.route("/busy")
+        def busy():
+            raise jobs.Rejected("busy", 2)
+
+        @server.route("/slow")
+        def slow():
+            raise TimeoutError("slow exceeded its limit of 1 seconds")
+
+        self.client = server.test_client()
+
+    def test_rejected_jobs_answer_service_unavailable(self):
+        response = self.client.get("/busy")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["Retry-After"], "2")
+        self.assertIn("busy", response.get_json()["error"])
+
+    def test_expired_jobs_answer_gateway_timeout(self):
+        response = self.client.get("/slow")
+        self.assertEqual(response.status_code, 504)
+        self.assertIn("slow", response.get_json()["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
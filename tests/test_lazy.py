@@ -0,0 +1,33 @@
+import sys
+import unittest
+from threading import Barrier, Thread
+
+from openspace_app.lazy import lazy_import
+
+#: module loaded by the test, it must not be imported anywhere else in the test suite
+MODULE = "openspace_app.optics"
+
+
+class TestLazyImport(unittest.TestCase):
+    def test_concurrent_first_access_sees_the_whole_module(self):
+        if MODULE in sys.modules:
+            self.skipTest("%s is already imported" % MODULE)
+
+        module = lazy_import(MODULE)
+        barrier = Barrier(16)
+        found = []
+
+        def access():
+            barrier.wait()
+            found.append(callable(getattr(module, "field_of_view", None)))
+
+        threads = [Thread(target=access) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(found, [True] * 16)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,30 @@
+import unittest
+
+import numpy as np
+
+from openspace_app import relative
+
+#: Semi-major axis in km of the geosynchronous origin vehicle used by the dashboard defaults
+SMA = 42164.0
+
+
+class TestTrajectory(unittest.TestCase):
+    def test_closed_form_matches_hill_propagator(self):
+        times = relative.display_times()
+        for state in ([-5, 0, 0, 0, 0, 0], [0, 10, 0, 0, 0, 0], [1, -2, 0.5, 1e-4, -2e-4, 3e-4]):
+            closed = relative.trajectory(np.array(state, dtype=float), SMA, times)
+            stepped = relative.trajectory(np.array(state, dtype=float), SMA, times, reference=True)
+            self.assertEqual(closed.shape, stepped.shape)
+            np.testing.assert_allclose(closed[:, :3], stepped[:, :3], rtol=0, atol=1e-9)
+            np.testing.assert_allclose(closed[:, 3:], stepped[:, 3:], rtol=0, atol=1e-12)
+
+    def test_batch_matches_single_states(self):
+        times = relative.planning_times(3600, 60)
+        states = np.array([[-5, 0, 0, 0, 0, 0], [0, 10, 0, 0, 0, 1e-3]], dtype=float)
+        batch = relative.trajectory(states, SMA, times)
+        for state, expected in zip(states, batch):
+            np.testing.assert_allclose(relative.trajectory(state, SMA, times), expected, rtol=0, atol=1e-12)
+
+
+if __name__ == "__main__":
+    unittest.main()
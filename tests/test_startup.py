@@ -0,0 +1,40 @@
+import subprocess
+import sys
+import unittest
+
+from openspace_app.lazy import DEFERRED
+
+#: Seconds importing the application may take in a fresh interpreter, about 0.8 s on a developer machine
+IMPORT_BUDGET = 3.0
+
+PROBE = f"""
+import sys
+import time
+start = time.perf_counter()
+import openspace_app.app
+print(time.perf_counter() - start)
+print(",".join(name for name in {DEFERRED!r} if name in sys.modules))
+"""
+
+
+class TestStartup(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        result = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, check=True)
+        wall, loaded = result.stdout.splitlines()[-2:]
+        cls.wall = float(wall)
+        cls.loaded = [name for name in loaded.split(",") if name]
+
+    def test_backend_modules_are_deferred(self):
+        self.assertEqual(self.loaded, [], "deferred modules imported at startup: " + ", ".join(self.loaded))
+
+    def test_import_time_within_budget(self):
+        self.assertLess(
+            self.wall,
+            IMPORT_BUDGET,
+            "importing the application took %.0f ms, see benchmarks/startup.py" % (self.wall * 1e3),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()